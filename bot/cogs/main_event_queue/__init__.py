@@ -1,11 +1,10 @@
-from bot.cogs.main_event_queue.main_event_commnads import MainEventCommands
-from bot.cogs.main_event_queue.main_event_queue_listener import MainEventQueueListener
-from bot.cogs.main_event_queue.main_event_queue_listener import QueueDisplayView
+# Voice joins drive the queue; queued members are resolved from the voice cache
+intents = {"voice_states"}
 
 
 async def setup(bot):
-    await  bot.wait_until_ready()
+    from bot.cogs.main_event_queue.main_event_commnads import MainEventCommands
+    from bot.cogs.main_event_queue.main_event_queue_listener import MainEventQueueListener
+
     await bot.add_cog(MainEventCommands(bot=bot))
-    cog = MainEventQueueListener(bot)
-    await bot.add_cog(cog)
-    bot.add_view(QueueDisplayView())
\ No newline at end of file
+    await bot.add_cog(MainEventQueueListener(bot))
@@ -5,7 +5,7 @@ from discord import app_commands
 class MainEventCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.main_config_collection = self.bot.db.main_config_collection
+        self.config_cache = self.bot.config_cache
 
     @app_commands.command(name="main_event_live_channel", description="Set the voice channel for live events.")
     @app_commands.guild_only()
@@ -15,8 +15,9 @@ class MainEventCommands(commands.Cog):
         Sets the voice channel where live events will be broadcast.
         """
         try:
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
+            await self.config_cache.update(
+                "main_event",
+                interaction.guild.id,
                 {"$set": {"live_event_channel_id": channel.id}},
                 upsert=True
             )
@@ -32,8 +33,9 @@ class MainEventCommands(commands.Cog):
         Adds a voice channel to the list of queue channels.
         """
         try:
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
+            await self.config_cache.update(
+                "main_event",
+                interaction.guild.id,
                 {"$addToSet": {"queue_channels_ids": channel.id}},
                 upsert=True
             )
@@ -49,9 +51,11 @@ class MainEventCommands(commands.Cog):
         Removes a voice channel from the list of queue channels.
         """
         try:
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
-                {"$pull": {"queue_channels_ids": channel.id}}
+            await self.config_cache.update(
+                "main_event",
+                interaction.guild.id,
+                {"$pull": {"queue_channels_ids": channel.id}},
+                upsert=False
             )
             await interaction.response.send_message(f"Removed {channel.mention} from queue channels.", ephemeral=True)
         except Exception as e:
@@ -65,8 +69,9 @@ class MainEventCommands(commands.Cog):
         Sets the text channel where the queue will be displayed.
         """
         try:
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
+            await self.config_cache.update(
+                "main_event",
+                interaction.guild.id,
                 {"$set": {"queue_display_channel_id": channel.id}},
                 upsert=True
             )
@@ -83,8 +88,9 @@ class MainEventCommands(commands.Cog):
         """
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
+            await self.config_cache.update(
+                "main_event",
+                interaction.guild.id,
                 {"$set": {"log_channel_id": channel.id}},
                 upsert=True
             )
@@ -101,16 +107,10 @@ class MainEventCommands(commands.Cog):
         """
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            # Clear the current_queue in the database
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
-                {"$set": {"current_queue": []}}
-            )
-
-            # Get the QueueListener cog to update the display
+            # Get the QueueListener cog to clear the queue and update the display
             queue_listener_cog = self.bot.get_cog("MainEventQueueListener")
             if queue_listener_cog:
-                await queue_listener_cog.update_queue_display(interaction.guild)
+                await queue_listener_cog.clear_queue(interaction.guild)
                 await interaction.followup.send("Queue cleared and display updated.", ephemeral=True)
             else:
                 await interaction.followup.send("Error: Queue listener cog not found.", ephemeral=True)
@@ -124,23 +124,12 @@ class MainEventCommands(commands.Cog):
     async def main_event_skip_queue(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            config = await self.main_config_collection.find_one({"_id": interaction.guild.id})
-            queue = config.get("current_queue", [])
-
-            if not queue:
-                await interaction.followup.send("The queue is already empty.", ephemeral=True)
-                return
-
-            queue.pop(0)
-
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
-                {"$set": {"current_queue": queue}}
-            )
-
             queue_listener_cog = self.bot.get_cog("MainEventQueueListener")
             if queue_listener_cog:
-                await queue_listener_cog.update_queue_display(interaction.guild)
+                if not await queue_listener_cog.skip_first(interaction.guild):
+                    await interaction.followup.send("The queue is already empty.", ephemeral=True)
+                    return
+
                 await interaction.followup.send("Skipped the first member and updated the display.", ephemeral=True)
             else:
                 await interaction.followup.send("Error: Queue listener cog not found.", ephemeral=True)
@@ -155,26 +144,15 @@ class MainEventCommands(commands.Cog):
         await interaction.response.defer(ephemeral=True, thinking=True)
 
         try:
-            config = await self.main_config_collection.find_one({"_id": interaction.guild.id})
-            queue = config.get("current_queue", [])
-
-            member_id = member.id
-
-            # Find the queue entry
-            updated_queue = [entry for entry in queue if entry["user_id"] != member_id]
+            queue_listener_cog = self.bot.get_cog("MainEventQueueListener")
+            if not queue_listener_cog:
+                await interaction.followup.send("Error: Queue listener cog not found.", ephemeral=True)
+                return
 
-            if len(updated_queue) == len(queue):
+            if not await queue_listener_cog.remove_from_queue(interaction.guild, member.id):
                 await interaction.followup.send(f"{member.mention} is not in the queue.", ephemeral=True)
                 return
 
-            # Save updated queue
-            await self.main_config_collection.update_one(
-                {"_id": interaction.guild.id},
-                {"$set": {"current_queue": updated_queue}}
-            )
-            queue_listener_cog = self.bot.get_cog("MainEventQueueListener")
-            if queue_listener_cog:
-                await queue_listener_cog.update_queue_display(interaction.guild)
             await interaction.followup.send(f"{member.mention} has been removed from the queue.", ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f"Error removing user from queue: {e}", ephemeral=True)
@@ -185,16 +163,16 @@ class MainEventCommands(commands.Cog):
     async def main_event(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            config = await self.main_config_collection.find_one({"_id": interaction.guild.id})
+            config = await self.config_cache.get("main_event", interaction.guild.id)
 
             if not config:
                 await interaction.followup.send("No main event configuration found for this guild.", ephemeral=True)
                 return
 
-            live_event_channel_id = config.get("live_event_channel_id")
-            queue_channels_ids = config.get("queue_channels_ids", [])
-            queue_display_channel_id = config.get("queue_display_channel_id")
-            log_channel_id = config.get("log_channel_id")
+            live_event_channel_id = config.live_event_channel_id
+            queue_channels_ids = config.queue_channels_ids
+            queue_display_channel_id = config.queue_display_channel_id
+            log_channel_id = config.log_channel_id
 
             message = "**Main Event Channel Configuration:**\n"
 
@@ -2,49 +2,36 @@ import discord
 from discord.ext import commands
 import datetime
 
+from bot.config import queue_render_window
+from bot.utils.paged_display import PAGE_SIZE, PagedDisplayView, page_count, page_slice
+from bot.utils.render_scheduler import RenderScheduler
 
-class QueueDisplayView(discord.ui.View):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.timeout = None  # Make the view persistent
-
-    async def add_buttons(self, guild: discord.Guild, current_queue: list):
-        self.clear_items() # Clear existing buttons
-        for entry in current_queue:
-            user = guild.get_member(entry["user_id"])
-            if user:
-                button = discord.ui.Button(
-                    label=f"Move {user.display_name}",
-                    style=discord.ButtonStyle.primary,
-                    custom_id=f"move_user_{user.id}"
-                )
-                button.callback = self.move_user_callback
-                self.add_item(button)
-
-    async def on_error(self, interaction: discord.Interaction, error: Exception, item: discord.ui.Item):
-        await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
-
-    async def move_user_callback(self, interaction: discord.Interaction):
-        # This method will now handle the logic, getting the cog from the bot
+
+class QueueDisplayView(PagedDisplayView):
+    def __init__(self, page: int = 0, pages: int = 1, options=()):
+        super().__init__("main_event_queue", "Move a user to the live channel", page, pages, options)
+
+    async def on_page(self, interaction: discord.Interaction, delta: int):
         cog = interaction.client.get_cog("MainEventQueueListener")
         if not cog:
             await interaction.response.send_message("Error: Queue listener not found.", ephemeral=True)
             return
+        await cog.turn_page(interaction, delta)
 
-        try:
-            user_id = int(interaction.data["custom_id"].split("_")[-1])
-        except (KeyError, ValueError):
-            await interaction.response.send_message("Invalid button.", ephemeral=True)
+    async def on_target(self, interaction: discord.Interaction, user_id: int):
+        cog = interaction.client.get_cog("MainEventQueueListener")
+        if not cog:
+            await interaction.response.send_message("Error: Queue listener not found.", ephemeral=True)
             return
 
         guild = interaction.guild
-        config = await cog.main_config_collection.find_one({"_id": guild.id})
+        config = await cog.config_cache.get("main_event", guild.id)
         if not config:
             await interaction.response.send_message("Config not found.", ephemeral=True)
             return
 
-        live_event_channel = guild.get_channel(int(config.get("live_event_channel_id", 0)))
-        log_channel = guild.get_channel(int(config.get("log_channel_id", 0)))
+        live_event_channel = guild.get_channel(config.live_event_channel_id or 0)
+        log_channel = guild.get_channel(config.log_channel_id or 0)
 
         if not isinstance(live_event_channel, discord.VoiceChannel):
             await interaction.response.send_message("Live channel not set correctly.", ephemeral=True)
@@ -64,20 +51,11 @@ class QueueDisplayView(discord.ui.View):
             return
 
         try:
-            await member_to_move.move_to(live_event_channel)
+            await cog.move_to_live(guild, member_to_move, live_event_channel)
             await interaction.response.send_message(f"✅ Moved {member_to_move.mention} to {live_event_channel.mention}.", ephemeral=True)
 
-            current_queue = config.get("current_queue", [])
-            updated_queue = [entry for entry in current_queue if entry["user_id"] != user_id]
-            await cog.main_config_collection.update_one(
-                {"_id": guild.id},
-                {"$set": {"current_queue": updated_queue}}
-            )
-
-            await cog.update_queue_display(guild)
-
             if log_channel:
-                await log_channel.send(f"{member_to_move.mention} was moved to {live_event_channel.mention} by {interaction.user.mention}.")
+                cog.bot.log_sink.log(log_channel, f"{member_to_move.mention} was moved to {live_event_channel.mention} by {interaction.user.mention}.")
         except discord.Forbidden:
             await interaction.response.send_message("I don't have permission to move members.", ephemeral=True)
         except Exception as e:
@@ -87,85 +65,152 @@ class QueueDisplayView(discord.ui.View):
 class MainEventQueueListener(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.main_config_collection = bot.db.main_config_collection
+        self.config_cache = bot.config_cache
+        self.render_scheduler = RenderScheduler(self.render_queue_display, window=queue_render_window)
+        self.pages = {}  # guild id -> page shown on the queue display
+
+    async def cog_load(self):
+        self.bot.voice_router.register(self)
+        self.bot.add_view(QueueDisplayView())
+
+    async def cog_unload(self):
+        self.bot.voice_router.unregister(self)
+        self.render_scheduler.cancel_all()
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    async def voice_channel_ids(self, guild: discord.Guild):
+        config = await self.config_cache.get("main_event", guild.id)
+        return config.queue_channels_ids if config else []
+
+    async def handle_voice_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.bot:
             return
 
         guild = member.guild
-        config = await self.main_config_collection.find_one({"_id": guild.id})
+        config = await self.config_cache.get("main_event", guild.id)
         if not config:
             return
 
-        queue_channel_ids = [int(cid.get("$numberLong", 0)) if isinstance(cid, dict) else int(cid) for cid in config.get("queue_channels_ids", [])]
-        queue_display_channel_id = int(config.get("queue_display_channel_id", 0))
-        log_channel_id = int(config.get("log_channel_id", 0))
+        queue_channel_ids = config.queue_channels_ids
+        log_channel_id = config.log_channel_id
 
         if after.channel and after.channel.id in queue_channel_ids and (not before.channel or before.channel.id not in queue_channel_ids):
             if member.id == guild.owner_id:
                 return
 
-            current_queue = config.get("current_queue", [])
-            if not any(entry["user_id"] == member.id for entry in current_queue):
-                current_queue.append({
-                    "user_id": member.id,
-                    "join_time": datetime.datetime.utcnow().isoformat()
-                })
-                await self.main_config_collection.update_one(
-                    {"_id": guild.id},
-                    {"$set": {"current_queue": current_queue}},
-                    upsert=True
-                )
-                await self.update_queue_display(guild)
-
+            already_queued = self.bot.queues.contains("main_event", guild.id, member.id)
+            if not already_queued and await self.enqueue(guild, member.id):
                 if log_channel_id:
                     log_channel = guild.get_channel(log_channel_id)
                     if log_channel:
-                        await log_channel.send(f"{member.mention} joined the queue.")
+                        self.bot.log_sink.log(log_channel, f"{member.mention} joined the queue.")
+
+    # Queue commands run on the guild's actor, so joins, skips, moves and
+    # resets from listeners, buttons and slash commands apply in order. Each
+    # one is an in-memory update on the queue store (written behind to the
+    # database) and schedules a display refresh.
+
+    async def enqueue(self, guild: discord.Guild, user_id: int) -> bool:
+        """Append a user to the queue unless they are already in it."""
+        return await self._run(guild, lambda: self._enqueue(guild.id, user_id))
+
+    async def remove_from_queue(self, guild: discord.Guild, user_id: int) -> bool:
+        return await self._run(guild, lambda: self._remove(guild.id, user_id))
+
+    async def skip_first(self, guild: discord.Guild) -> bool:
+        return await self._run(guild, lambda: self._skip_first(guild.id))
+
+    async def clear_queue(self, guild: discord.Guild):
+        await self._run(guild, lambda: self._clear(guild.id))
+
+    async def move_to_live(self, guild: discord.Guild, member: discord.Member, live_channel: discord.VoiceChannel):
+        async def move():
+            await self.bot.actions.move(member, live_channel)
+            return await self._remove(guild.id, member.id)
+
+        return await self._run(guild, move)
+
+    async def _run(self, guild: discord.Guild, command):
+        result = await self.bot.queue_actor.run(guild.id, command)
+        self.request_queue_display(guild)
+        return result
+
+    async def _enqueue(self, guild_id: int, user_id: int) -> bool:
+        return self.bot.queues.push("main_event", guild_id, {
+            "user_id": user_id,
+            "join_time": datetime.datetime.utcnow().isoformat()
+        })
 
-    async def update_queue_display(self, guild: discord.Guild):
-        config = await self.main_config_collection.find_one({"_id": guild.id})
-        queue_display_channel_id = int(config.get("queue_display_channel_id", 0))
-        queue_display_channel = guild.get_channel(queue_display_channel_id)
+    async def _remove(self, guild_id: int, user_id: int) -> bool:
+        return self.bot.queues.remove("main_event", guild_id, user_id)
+
+    async def _skip_first(self, guild_id: int) -> bool:
+        return self.bot.queues.pop_first("main_event", guild_id) is not None
+
+    async def _clear(self, guild_id: int):
+        self.bot.queues.clear("main_event", guild_id)
+
+    def request_queue_display(self, guild: discord.Guild):
+        """Schedule a coalesced refresh of the guild's queue display."""
+        self.render_scheduler.mark_dirty(guild)
+
+    async def render_queue_display(self, guild: discord.Guild):
+        config = await self.config_cache.get("main_event", guild.id)
+        if not config:
+            return
+        queue_display_channel = guild.get_channel(config.queue_display_channel_id or 0)
         if not queue_display_channel or not isinstance(queue_display_channel, discord.TextChannel):
             return
 
-        current_queue = config.get("current_queue", [])
-        current_queue.sort(key=lambda x: x["join_time"])
+        async def persist_message_id(message_id: int):
+            await self.config_cache.update(
+                "main_event",
+                guild.id,
+                {"$set": {"queue_message_id": message_id}}
+            )
+
+        try:
+            await self.bot.displays.publish(
+                queue_display_channel,
+                guild.id,
+                "main_event_queue",
+                config.queue_message_id,
+                persist_message_id,
+                **self.build_queue_display(guild, config)
+            )
+        except Exception as e:
+            print(f"Error updating queue display for guild {guild.id}: {e}")
+
+    def build_queue_display(self, guild: discord.Guild, config) -> dict:
+        """Embed and view for the guild's current page of the queue."""
+        current_queue = self.bot.queues.get("main_event", guild.id)
+        page, entries = page_slice(current_queue, self.pages.get(guild.id, 0))
+        self.pages[guild.id] = page
 
         embed = discord.Embed(title="🎧 Current Queue", color=discord.Color.blurple())
-        if current_queue:
+        options = []
+        if entries:
             lines = []
-            for i, entry in enumerate(current_queue):
+            for i, entry in enumerate(entries, start=page * PAGE_SIZE + 1):
                 user = guild.get_member(entry["user_id"])
-                if user:
-                    join_time = datetime.datetime.fromisoformat(entry["join_time"]).strftime('%H:%M:%S')
-                    lines.append(f"{i+1}. {user.mention} (Joined at `{join_time}`)")
+                join_time = datetime.datetime.fromisoformat(entry["join_time"]).strftime('%H:%M:%S')
+                lines.append(f"{i}. <@{entry['user_id']}> (Joined at `{join_time}`)")
+                options.append(discord.SelectOption(
+                    label=f"{i}. {user.display_name if user else entry['user_id']}",
+                    value=str(entry["user_id"])
+                ))
             embed.description = "\n".join(lines)
+            embed.set_footer(text=f"{len(current_queue)} in queue")
         else:
             embed.description = "The queue is currently empty."
 
-        view = QueueDisplayView()
-        await view.add_buttons(guild, current_queue)
+        view = QueueDisplayView(page, page_count(len(current_queue)), options)
+        return {"embed": embed, "view": view}
 
-        message_id = config.get("queue_message_id")
-        try:
-            if message_id:
-                message = await queue_display_channel.fetch_message(int(message_id))
-                await message.edit(embed=embed, view=view)
-            else:
-                message = await queue_display_channel.send(embed=embed, view=view)
-                await self.main_config_collection.update_one(
-                    {"_id": guild.id},
-                    {"$set": {"queue_message_id": message.id}}
-                )
-        except discord.NotFound:
-            message = await queue_display_channel.send(embed=embed, view=view)
-            await self.main_config_collection.update_one(
-                {"_id": guild.id},
-                {"$set": {"queue_message_id": message.id}}
-            )
-        except Exception as e:
-            print(f"Error updating queue display for guild {guild.id}: {e}")
+    async def turn_page(self, interaction: discord.Interaction, delta: int):
+        guild = interaction.guild
+        config = await self.config_cache.get("main_event", guild.id)
+        if not config:
+            await interaction.response.send_message("Config not found.", ephemeral=True)
+            return
+        self.pages[guild.id] = self.pages.get(guild.id, 0) + delta
+        await interaction.response.edit_message(**self.build_queue_display(guild, config))
@@ -0,0 +1,32 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+QUEUE_LABELS = {
+    "main_event": "🎧 Main Event",
+    "twitch_ward": "🎮 Twitch Ward",
+}
+
+
+class QueuePosition(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="queue_position", description="Show your place in this server's queues.")
+    @app_commands.guild_only()
+    async def queue_position(self, interaction: discord.Interaction):
+        queues = self.bot.queues
+        lines = []
+        for name, label in QUEUE_LABELS.items():
+            position = queues.position(name, interaction.guild.id, interaction.user.id)
+            if position is not None:
+                lines.append(f"{label}: **#{position}** of {queues.size(name, interaction.guild.id)}")
+
+        await interaction.response.send_message(
+            "\n".join(lines) or "You're not in any queue right now.",
+            ephemeral=True
+        )
+
+
+async def setup(bot):
+    await bot.add_cog(QueuePosition(bot))
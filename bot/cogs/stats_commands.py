@@ -0,0 +1,43 @@
+import time
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+
+class StatsCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="shard_stats", description="Show per-shard latency, voice event rate and backlog (Admin Only)")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def shard_stats(self, interaction: discord.Interaction):
+        router = self.bot.voice_router
+        minutes = max((time.monotonic() - router.started) / 60, 1 / 60)
+
+        guilds_by_shard = {}
+        for guild in self.bot.guilds:
+            guilds_by_shard.setdefault(guild.shard_id, []).append(guild)
+
+        embed = discord.Embed(title="📊 Shard Stats", color=discord.Color.blue())
+        for shard_id, latency in sorted(self.bot.shard_latencies())[:25]:
+            guilds = guilds_by_shard.get(shard_id, [])
+            events = router.events[shard_id]
+            backlog = sum(self.bot.queue_actor.backlog(guild.id) for guild in guilds)
+            embed.add_field(
+                name=f"Shard {shard_id}",
+                value=(
+                    f"Latency: `{latency * 1000:.0f} ms`\n"
+                    f"Guilds: `{len(guilds)}`\n"
+                    f"Voice events: `{events}` (`{events / minutes:.1f}/min`)\n"
+                    f"Handlers running: `{router.in_flight[shard_id]}`\n"
+                    f"Queue backlog: `{backlog}`"
+                ),
+                inline=True
+            )
+        embed.set_footer(text=f"Pending Discord actions: {self.bot.actions.backlog()}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(StatsCommands(bot))
@@ -1,9 +1,10 @@
-from bot.cogs.temp_channels.temp_commands import TempCommands
-from bot.cogs.temp_channels.temp_channel_builder import TempChannelBuilder
-
+# Hub joins and empty channels come from voice state updates
+intents = {"voice_states"}
 
 
 async def setup(bot):
-    await  bot.wait_until_ready()
+    from bot.cogs.temp_channels.temp_commands import TempCommands
+    from bot.cogs.temp_channels.temp_channel_builder import TempChannelBuilder
+
     await bot.add_cog(TempCommands(bot=bot))
-    await bot.add_cog(TempChannelBuilder(bot=bot))
\ No newline at end of file
+    await bot.add_cog(TempChannelBuilder(bot=bot))
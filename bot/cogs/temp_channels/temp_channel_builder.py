@@ -1,78 +1,306 @@
 import asyncio
+import datetime
 
 import discord
 from discord.ext import commands
 
+from bot.cogs.temp_channels.temp_registry import TempRegistry
+from bot.config import temp_channel_grace_seconds
+from bot.utils.action_scheduler import Priority, channel_edit_bucket, guild_channels_bucket
+
+CATEGORY_NAME = "┌──── TEMP CHANNELS────┐"
+SPARE_NAME = "spare"
+# Orphaned channels deleted at once while reconciling after a restart
+RECONCILE_CONCURRENCY = 5
+
 
 class TempChannelBuilder(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.temp_collection = self.bot.db.temp_collection
+        self.config_cache = self.bot.config_cache
+        self.registry = TempRegistry(self.bot.db.temp_registry)
         self.created_channels = {}
+        # Hidden, pre-created channels per hub, handed out on join so the
+        # member only waits for a move
+        self.spares = {}
+        self._filling = {}
+        self._restoring = None
+        self.category_ids = {}
+        self._category_locks = {}
+
+    async def cog_load(self):
+        self.bot.voice_router.register(self)
+        self._restoring = asyncio.create_task(self.restore())
+
+    async def cog_unload(self):
+        self.bot.voice_router.unregister(self)
+        if self._restoring:
+            self._restoring.cancel()
+        for task in self._filling.values():
+            task.cancel()
+
+    async def voice_channel_ids(self, guild: discord.Guild):
+        config = await self.config_cache.get("temp_channels", guild.id)
+        hub_ids = config.channel_ids if config else set()
+        created_ids = {cid for cid in self.created_channels if guild.get_channel(cid)}
+        return hub_ids | created_ids
+
+    def cached_category(self, guild: discord.Guild):
+        category = guild.get_channel(self.category_ids.get(guild.id, 0))
+        return category if isinstance(category, discord.CategoryChannel) else None
+
+    async def get_category(self, guild: discord.Guild) -> discord.CategoryChannel:
+        """
+        The guild's temp channel category. Its id is cached, so this is a dict
+        lookup after the first call; resolving or creating it is single-flight
+        per guild, so concurrent joins can't create duplicate categories.
+        """
+        category = self.cached_category(guild)
+        if category:
+            return category
+
+        lock = self._category_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            category = self.cached_category(guild) or discord.utils.get(guild.categories, name=CATEGORY_NAME)
+
+            # Create category only once if it doesn't exist
+            if not category:
+                bot_member = guild.me
+                overwrites = {
+                    bot_member: discord.PermissionOverwrite(
+                        manage_channels=True,
+                        move_members=True,
+                        view_channel=True,
+                        connect=True,
+                        speak=True
+                    )
+                }
+                category = await self.bot.actions.submit(
+                    guild_channels_bucket(guild),
+                    Priority.MOVE,
+                    lambda: guild.create_category(CATEGORY_NAME, overwrites=overwrites)
+                )
+            self.category_ids[guild.id] = category.id
+        return category
+
+    async def delete_channel(self, channel: discord.VoiceChannel):
+        await self.bot.actions.submit(channel_edit_bucket(channel), Priority.DISPLAY, channel.delete)
+
+    async def restore(self):
+        """
+        Reconcile the persisted registry with the gateway cache: occupied temp
+        channels are tracked again, empty ones are deleted, spares that still
+        exist go back into their pools. Then top up the pools.
+
+        Voice events are already being handled while this runs, so the
+        registry is corrected entry by entry rather than overwritten.
+        """
+        await self.bot.wait_until_ready()
+        try:
+            guilds = {guild.id: guild for guild in self.bot.guilds}
+            registries = await self.registry.load(guilds)
+            orphans = []
+            corrections = {}
+            for guild_id, registry in registries.items():
+                guild = guilds[guild_id]
+                correction = corrections[guild_id] = {"untrack": [], "drop_spares": {}, "claimed": {}}
+                for channel_id, hub_id in registry["channels"].items():
+                    channel = guild.get_channel(channel_id)
+                    if channel is not None and channel.members:
+                        self.created_channels.setdefault(channel_id, hub_id)
+                        continue
+                    correction["untrack"].append(channel_id)
+                    if channel is not None:
+                        orphans.append((channel, hub_id))
+                for hub_id, channel_ids in registry["spares"].items():
+                    for channel_id in channel_ids:
+                        channel = guild.get_channel(channel_id)
+                        if channel is not None and not channel.members:
+                            if channel_id not in self.spares.setdefault(hub_id, []):
+                                self.spares[hub_id].append(channel_id)
+                            continue
+                        correction["drop_spares"].setdefault(hub_id, []).append(channel_id)
+                        if channel is not None:
+                            # Handed out just before the restart
+                            correction["claimed"][channel_id] = hub_id
+                            self.created_channels.setdefault(channel_id, hub_id)
+                self.bot.voice_router.invalidate(guild_id)
+
+            await self.registry.reconcile(corrections)
+
+            semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+
+            async def delete_orphan(channel, hub_id):
+                async with semaphore:
+                    if channel.id in self.created_channels:
+                        return  # Reused since the snapshot
+                    if channel.members:
+                        # Someone joined since the snapshot: keep tracking it
+                        self.created_channels[channel.id] = hub_id
+                        await self.registry.track(channel.guild.id, channel.id, hub_id)
+                        return
+                    try:
+                        await self.delete_channel(channel)
+                    except discord.HTTPException as e:
+                        print(f"Error deleting orphaned temp channel {channel.id}: {e}")
+
+            await asyncio.gather(*(delete_orphan(channel, hub_id) for channel, hub_id in orphans))
+            print(f"Restored {len(self.created_channels)} temp channels, deleted {len(orphans)} orphans")
+        except Exception as e:
+            print(f"Error restoring temp channel registry: {e}")
+
+        await self.warm_pools()
 
     @commands.Cog.listener()
-    async def on_voice_state_update(self, member, before, after):
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if self.created_channels.pop(channel.id, None) is not None:
+            await self.registry.untrack(channel.guild.id, channel.id)
+            return
+        # A spare deleted by hand must not be handed out later
+        for hub_id, spares in self.spares.items():
+            if channel.id in spares:
+                spares.remove(channel.id)
+                await self.registry.remove_spare(channel.guild.id, hub_id, channel.id)
+                self.ensure_pool(channel.guild, hub_id)
+                return
+
+    # Spare pool
+
+    async def warm_pools(self):
+        for guild in self.bot.guilds:
+            config = await self.config_cache.get("temp_channels", guild.id)
+            if config:
+                for hub_id in config.pool_sizes:
+                    self.ensure_pool(guild, hub_id)
+
+    def ensure_pool(self, guild: discord.Guild, hub_id: int):
+        """Top up (or trim) a hub's spare pool in the background."""
+        if hub_id not in self._filling:
+            self._filling[hub_id] = asyncio.create_task(self._fill_pool(guild, hub_id))
+
+    async def _fill_pool(self, guild: discord.Guild, hub_id: int):
+        try:
+            while True:
+                config = await self.config_cache.get("temp_channels", guild.id)
+                size = config.pool_sizes.get(hub_id, 0) if config and hub_id in config.channel_ids else 0
+                spares = self.spares.setdefault(hub_id, [])
+                spares[:] = [cid for cid in spares if guild.get_channel(cid)]
+
+                if len(spares) < size:
+                    category = await self.get_category(guild)
+                    overwrites = {
+                        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                        guild.me: discord.PermissionOverwrite(view_channel=True, connect=True, manage_channels=True,
+                                                              move_members=True)
+                    }
+                    spare = await self.bot.actions.submit(
+                        guild_channels_bucket(guild),
+                        Priority.DISPLAY,
+                        lambda: category.create_voice_channel(name=SPARE_NAME, overwrites=overwrites)
+                    )
+                    spares.append(spare.id)
+                    await self.registry.add_spare(guild.id, hub_id, spare.id)
+                elif len(spares) > size:
+                    channel_id = spares.pop()
+                    await self.delete_channel(guild.get_channel(channel_id))
+                    await self.registry.remove_spare(guild.id, hub_id, channel_id)
+                else:
+                    break
+        except Exception as e:
+            print(f"Error filling temp channel pool for hub {hub_id}: {e}")
+        finally:
+            self._filling.pop(hub_id, None)
+
+    def claim_spare(self, guild: discord.Guild, hub_id: int):
+        spares = self.spares.get(hub_id, [])
+        while spares:
+            channel = guild.get_channel(spares.pop(0))
+            if channel:
+                return channel
+        return None
+
+    # Voice events
+
+    async def open_channel(self, member: discord.Member, hub: discord.VoiceChannel):
         guild = member.guild
-        category_name = "┌──── TEMP CHANNELS────┐"
-        category = discord.utils.get(guild.categories, name=category_name)
-
-        # Create category only once if it doesn't exist
-        if not category:
-            bot_member = guild.me
-            overwrites = {
-                bot_member: discord.PermissionOverwrite(
-                    manage_channels=True,
-                    move_members=True,
-                    view_channel=True,
-                    connect=True,
-                    speak=True
-                )
-            }
-            category = await guild.create_category(category_name, overwrites=overwrites)
-
-        # User joined a voice channel
-        if after.channel and not before.channel:
-            doc = await self.temp_collection.find_one({"_id": guild.id})
-            if doc and after.channel.id in doc.get("channel_ids", []):
-                overwrites = after.channel.overwrites
-                name = f"{member.name}'s channel"
-                user_limit = after.channel.user_limit if after.channel.user_limit != 0 else None
-
-                new_channel = await category.create_voice_channel(
-                    name=name,
-                    overwrites=overwrites,
-                    user_limit=user_limit
-                )
-                self.created_channels[new_channel.id] = after.channel.id
-                await asyncio.sleep(1)
-                await member.move_to(new_channel)
-
-        # User left a channel
-        if before.channel and not after.channel:
-            if before.channel.id in self.created_channels:
-                if len(before.channel.members) == 0:
-                    await before.channel.delete()
-                    del self.created_channels[before.channel.id]
-
-        # User moved between channels
-        if before.channel and after.channel and before.channel.id != after.channel.id:
-            if before.channel.id in self.created_channels:
-                if len(before.channel.members) == 0:
-                    await before.channel.delete()
-                    del self.created_channels[before.channel.id]
-
-            doc = await self.temp_collection.find_one({"_id": guild.id})
-            if doc and after.channel and after.channel.id in doc.get("channel_ids", []):
-                overwrites = after.channel.overwrites
-                name = f"{member.name}'s channel"
-                user_limit = after.channel.user_limit if after.channel.user_limit != 0 else None
-
-                new_channel = await category.create_voice_channel(
-                    name=name,
-                    overwrites=overwrites,
-                    user_limit=user_limit
-                )
-                self.created_channels[new_channel.id] = after.channel.id
-                await asyncio.sleep(1)
-                await member.move_to(new_channel)
+        name = f"{member.name}'s channel"
+        overwrites = hub.overwrites
+        user_limit = hub.user_limit if hub.user_limit != 0 else None
+
+        spare = self.claim_spare(guild, hub.id)
+        if spare:
+            self.created_channels[spare.id] = hub.id
+            self.bot.voice_router.invalidate(guild.id)
+            await self.bot.actions.move(member, spare)
+            self.bot.actions.submit(
+                channel_edit_bucket(spare),
+                Priority.MOVE,
+                lambda: spare.edit(name=name, overwrites=overwrites, user_limit=user_limit or 0)
+            )
+            await self.registry.claim_spare(guild.id, hub.id, spare.id)
+            self.ensure_pool(guild, hub.id)
+            return
+
+        category = await self.get_category(guild)
+        new_channel = await self.bot.actions.submit(
+            guild_channels_bucket(guild),
+            Priority.MOVE,
+            lambda: category.create_voice_channel(
+                name=name,
+                overwrites=overwrites,
+                user_limit=user_limit
+            )
+        )
+        self.created_channels[new_channel.id] = hub.id
+        self.bot.voice_router.invalidate(guild.id)
+        await asyncio.sleep(1)
+        await self.bot.actions.move(member, new_channel)
+        await self.registry.track(guild.id, new_channel.id, hub.id)
+        self.ensure_pool(guild, hub.id)
+
+    async def release_channel(self, channel: discord.VoiceChannel):
+        """Delete an empty temp channel once the grace period passes without anyone rejoining."""
+        if channel.id not in self.created_channels or len(channel.members) != 0:
+            return
+        if temp_channel_grace_seconds <= 0:
+            await self.delete_if_empty(channel.guild.id, channel.id)
+            return
+        self.bot.scheduler.add_job(
+            self.delete_if_empty,
+            "date",
+            run_date=datetime.datetime.now() + datetime.timedelta(seconds=temp_channel_grace_seconds),
+            args=[channel.guild.id, channel.id],
+            id=f"temp_delete:{channel.id}",
+            replace_existing=True
+        )
+
+    def keep_channel(self, channel: discord.VoiceChannel):
+        job = self.bot.scheduler.get_job(f"temp_delete:{channel.id}")
+        if job:
+            job.remove()
+
+    async def delete_if_empty(self, guild_id: int, channel_id: int):
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None and (channel_id not in self.created_channels or len(channel.members) != 0):
+            return
+        self.created_channels.pop(channel_id, None)
+        await self.registry.untrack(guild_id, channel_id)
+        if channel is not None:
+            await self.delete_channel(channel)
+
+    async def handle_voice_update(self, member, before, after):
+        guild = member.guild
+
+        # Someone came back to a temp channel that is waiting to be deleted
+        if after.channel and after.channel.id in self.created_channels:
+            self.keep_channel(after.channel)
+
+        # User left a channel, or moved out of one
+        if before.channel and (not after.channel or before.channel.id != after.channel.id):
+            await self.release_channel(before.channel)
 
+        # User joined or moved into a hub
+        if after.channel and (not before.channel or before.channel.id != after.channel.id):
+            config = await self.config_cache.get("temp_channels", guild.id)
+            if config and after.channel.id in config.channel_ids:
+                await self.open_channel(member, after.channel)
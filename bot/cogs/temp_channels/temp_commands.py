@@ -5,19 +5,21 @@ from discord import app_commands
 class TempCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.temp_collection = self.bot.db.temp_collection
+        self.config_cache = self.bot.config_cache
 
     @app_commands.command(name="temp_channels", description="Add a voice channel to the database (Admin Only)")
     @app_commands.checks.has_permissions(administrator=True)
     async def temp_channels(self, interaction: discord.Interaction, channel: discord.VoiceChannel):
         try:
             guild_id = interaction.guild.id
-            result = await self.temp_collection.update_one(
-                {"_id": guild_id},
-                {"$addToSet": {"channel_ids": channel.id}},
-                upsert=True
+            config = await self.config_cache.get("temp_channels", guild_id)
+            already_added = bool(config and channel.id in config.channel_ids)
+            await self.config_cache.update(
+                "temp_channels",
+                guild_id,
+                {"$addToSet": {"channel_ids": channel.id}}
             )
-            if result.upserted_id or (result.modified_count == 1 and result.matched_count == 1):
+            if not already_added:
                 await interaction.response.send_message(f"Successfully added voice channel: {channel.name} ({channel.id})", ephemeral=True)
             else:
                 await interaction.response.send_message(f"Voice channel: {channel.name} ({channel.id}) is already in the database.", ephemeral=True)
@@ -29,30 +31,61 @@ class TempCommands(commands.Cog):
     async def remove_temp_channel(self, interaction: discord.Interaction, channel: discord.VoiceChannel):
         try:
             guild_id = interaction.guild.id
-            result = await self.temp_collection.update_one(
-                {"_id": guild_id},
-                {"$pull": {"channel_ids": channel.id}}
+            config = await self.config_cache.get("temp_channels", guild_id)
+            was_added = bool(config and channel.id in config.channel_ids)
+            await self.config_cache.update(
+                "temp_channels",
+                guild_id,
+                {"$pull": {"channel_ids": channel.id}, "$unset": {f"pool_sizes.{channel.id}": ""}},
+                upsert=False
             )
-            if result.modified_count > 0:
+            builder = self.bot.get_cog("TempChannelBuilder")
+            if builder:
+                builder.ensure_pool(interaction.guild, channel.id)
+            if was_added:
                 await interaction.response.send_message(f"Successfully removed voice channel: {channel.name} ({channel.id})", ephemeral=True)
             else:
                 await interaction.response.send_message(f"Voice channel: {channel.name} ({channel.id}) was not found in the database for this guild.", ephemeral=True)
         except Exception as e:
             await interaction.response.send_message(f"An error occurred: {e}", ephemeral=True)
 
+    @app_commands.command(name="temp_pool", description="Keep spare channels ready for a temporary channel hub (Admin Only)")
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(size="Number of hidden spare channels to keep (0 disables the pool)")
+    async def temp_pool(self, interaction: discord.Interaction, channel: discord.VoiceChannel,
+                        size: app_commands.Range[int, 0, 10]):
+        try:
+            guild_id = interaction.guild.id
+            config = await self.config_cache.get("temp_channels", guild_id)
+            if not config or channel.id not in config.channel_ids:
+                await interaction.response.send_message(f"Voice channel: {channel.name} ({channel.id}) is not a temporary channel hub.", ephemeral=True)
+                return
+            await self.config_cache.update(
+                "temp_channels",
+                guild_id,
+                {"$set": {f"pool_sizes.{channel.id}": size}},
+                upsert=False
+            )
+            builder = self.bot.get_cog("TempChannelBuilder")
+            if builder:
+                builder.ensure_pool(interaction.guild, channel.id)
+            await interaction.response.send_message(f"Keeping {size} spare channels for {channel.name}.", ephemeral=True)
+        except Exception as e:
+            await interaction.response.send_message(f"An error occurred: {e}", ephemeral=True)
+
     @app_commands.command(name="list_temp_channels", description="List all configured temporary voice channels (Admin Only)")
     @app_commands.checks.has_permissions(administrator=True)
     async def list_temp_channels(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
             guild_id = interaction.guild.id
-            config = await self.temp_collection.find_one({"_id": guild_id})
+            config = await self.config_cache.get("temp_channels", guild_id)
 
-            if not config or not config.get("channel_ids"):
+            if not config or not config.channel_ids:
                 await interaction.followup.send("No temporary voice channels configured for this guild.", ephemeral=True)
                 return
 
-            channel_ids = config.get("channel_ids", [])
+            channel_ids = config.channel_ids
             message = "**Configured Temporary Voice Channels:**\n"
 
             if channel_ids:
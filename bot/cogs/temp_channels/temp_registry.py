@@ -0,0 +1,75 @@
+from typing import Dict, Iterable
+
+from pymongo import UpdateOne
+
+
+class TempRegistry:
+    """
+    Persistent record of the temp channels the bot created, so they can be
+    reconciled after a restart instead of leaking.
+
+    One small document per guild in the `temp_registry` collection:
+    `channels` maps active temp channel id -> hub id and `spares` maps hub id ->
+    spare channel ids. Ids are stored as strings where they are keys.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def load(self, guild_ids: Iterable[int]) -> Dict[int, dict]:
+        """Every listed guild's registry document, fetched with a single query."""
+        docs = {}
+        async for doc in self.collection.find({"guild_id": {"$in": list(guild_ids)}}):
+            docs[doc["guild_id"]] = {
+                "channels": {int(cid): hub_id for cid, hub_id in doc.get("channels", {}).items()},
+                "spares": {int(hub_id): list(cids) for hub_id, cids in doc.get("spares", {}).items()},
+            }
+        return docs
+
+    async def reconcile(self, corrections: Dict[int, dict]):
+        """
+        Apply restore's per-guild corrections in one bulk write. Each names the
+        channels to untrack, the spares to drop per hub and the spares that
+        were handed out (channel id -> hub id). Only those entries are
+        touched, so channels tracked while restore ran are kept.
+        """
+        requests = []
+        for guild_id, correction in corrections.items():
+            update = {}
+            if correction["untrack"]:
+                update["$unset"] = {f"channels.{cid}": "" for cid in correction["untrack"]}
+            if correction["drop_spares"]:
+                update["$pull"] = {f"spares.{hub_id}": {"$in": cids} for hub_id, cids in correction["drop_spares"].items()}
+            if correction["claimed"]:
+                update["$set"] = {f"channels.{cid}": hub_id for cid, hub_id in correction["claimed"].items()}
+            if update:
+                requests.append(UpdateOne({"guild_id": guild_id}, update))
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+
+    async def track(self, guild_id: int, channel_id: int, hub_id: int):
+        await self.collection.update_one(
+            {"guild_id": guild_id},
+            {"$set": {f"channels.{channel_id}": hub_id}},
+            upsert=True
+        )
+
+    async def untrack(self, guild_id: int, channel_id: int):
+        await self.collection.update_one({"guild_id": guild_id}, {"$unset": {f"channels.{channel_id}": ""}})
+
+    async def add_spare(self, guild_id: int, hub_id: int, channel_id: int):
+        await self.collection.update_one(
+            {"guild_id": guild_id},
+            {"$push": {f"spares.{hub_id}": channel_id}},
+            upsert=True
+        )
+
+    async def remove_spare(self, guild_id: int, hub_id: int, channel_id: int):
+        await self.collection.update_one({"guild_id": guild_id}, {"$pull": {f"spares.{hub_id}": channel_id}})
+
+    async def claim_spare(self, guild_id: int, hub_id: int, channel_id: int):
+        """Record a spare handed out to a member as an active temp channel."""
+        await self.collection.update_one(
+            {"guild_id": guild_id},
+            {"$pull": {f"spares.{hub_id}": channel_id}, "$set": {f"channels.{channel_id}": hub_id}}
+        )
@@ -1,7 +1,10 @@
-from bot.cogs.twitch_ward_queue.commands import TwitchQueueCommands
-from bot.cogs.twitch_ward_queue.queue_listner import QueueListener
+# Voice joins drive the queue; queued members are resolved from the voice cache
+intents = {"voice_states"}
 
 
 async def setup(bot):
+    from bot.cogs.twitch_ward_queue.commands import TwitchQueueCommands
+    from bot.cogs.twitch_ward_queue.queue_listner import QueueListener
+
     await bot.add_cog(TwitchQueueCommands(bot=bot))
     await bot.add_cog(QueueListener(bot=bot))
@@ -1,13 +1,12 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from bot.cogs.twitch_ward_queue.queue_listner import QueueListener
 
 
 class TwitchQueueCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.twitch_ward_config_collection = self.bot.db.twitch_ward_config_collection
+        self.config_cache = self.bot.config_cache
 
     @app_commands.command(
         name="set_waiting_channel", description="Set the Waiting Room Voice Channel"
@@ -16,10 +15,10 @@ class TwitchQueueCommands(commands.Cog):
     async def set_waiting_channel(
         self, interaction: discord.Interaction, channel: discord.VoiceChannel
     ):
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"waiting_channel_id": channel.id}},
-            upsert=True
+        await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"waiting_channel_id": channel.id}}
         )
         await interaction.response.send_message(
             f"✅ Waiting Room set to: {channel.mention}", ephemeral=True
@@ -32,10 +31,10 @@ class TwitchQueueCommands(commands.Cog):
     async def set_live_channel(
         self, interaction: discord.Interaction, channel: discord.VoiceChannel
     ):
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"live_channel_id": channel.id}},
-            upsert=True
+        await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"live_channel_id": channel.id}}
         )
         await interaction.response.send_message(
             f"✅ Live Room set to: {channel.mention}", ephemeral=True
@@ -48,10 +47,10 @@ class TwitchQueueCommands(commands.Cog):
     async def set_log_channel(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"queue_log_channel": channel.id}},
-            upsert=True
+        await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"queue_log_channel": channel.id}}
         )
         await interaction.response.send_message(
             f"📓 Log channel set to:: {channel.mention}", ephemeral=True
@@ -65,10 +64,10 @@ class TwitchQueueCommands(commands.Cog):
     async def set_queue_display_channel(
         self, interaction: discord.Interaction, channel: discord.TextChannel
     ):
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"queue_text_channel_id": channel.id}},
-            upsert=True
+        await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"queue_text_channel_id": channel.id}}
         )
         await interaction.response.send_message(
             f"📋 Queue display channel set to: {channel.mention}", ephemeral=True
@@ -86,30 +85,49 @@ class TwitchQueueCommands(commands.Cog):
             )
             return
 
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"max_guests": number}},
-            upsert=True
+        await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"max_guests": number}}
         )
         await interaction.response.send_message(
             f"👥 Guest limit set to {number}.", ephemeral=True
         )
 
+    @app_commands.command(
+        name="set_queue_priority",
+        description="Serve members with a role ahead of others in the queue",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(tier="Higher tiers are served first (0 removes the role's priority)")
+    async def set_queue_priority(
+        self, interaction: discord.Interaction, role: discord.Role, tier: app_commands.Range[int, 0, 5]
+    ):
+        if tier == 0:
+            update = {"$unset": {f"priority_tiers.{role.id}": ""}}
+        else:
+            update = {"$set": {f"priority_tiers.{role.id}": tier}}
+        await self.config_cache.update("twitch_ward", interaction.guild.id, update)
+
+        message = f"⭐ {role.mention} queues at tier {tier}." if tier else f"➖ {role.mention} no longer has queue priority."
+        await interaction.response.send_message(
+            f"{message} Members already waiting keep their place.", ephemeral=True
+        )
+
     @app_commands.command(
         name="show_queue", description="Show the current twitch_ward_queue manualy"
     )
     async def show_queue(self, interaction: discord.Interaction):
         await interaction.response.defer()
-        config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
+        config = await self.config_cache.get("twitch_ward", interaction.guild.id)
 
         if not config:
             await interaction.response.send_message(f"⚠️ Queue is not configured.")
             return
 
-        listner = QueueListener(self.bot)
-        await listner.update_queue_display(interaction.guild, config=config)
+        listner = self.bot.get_cog("QueueListener")
+        await listner.refresh_queue(interaction.guild)
 
-        # await self.update_queue_display(interaction.guild, config=config)
         await interaction.followup.send(f"✅ Queue display updated.")
 
     @app_commands.command(name="reset_queue", description="Clear the entire twitch_ward_queue")
@@ -117,18 +135,14 @@ class TwitchQueueCommands(commands.Cog):
     async def reset_queue(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
+        config = await self.config_cache.get("twitch_ward", interaction.guild.id)
 
         if not config:
             await interaction.response.send_message(f"⚠️ Queue is not configured")
             return
 
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"twitch_ward_queue": []}}
-        )
-        listner = QueueListener(self.bot)
-        await listner.update_queue_display(interaction.guild, config=config)
+        listner = self.bot.get_cog("QueueListener")
+        await listner.reset_queue(interaction.guild)
         await interaction.followup.send(f"🗑️ Queue has been reset.")
 
     @app_commands.command(
@@ -138,63 +152,35 @@ class TwitchQueueCommands(commands.Cog):
     async def skip_queue(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
+        config = await self.config_cache.get("twitch_ward", interaction.guild.id)
 
         if not config:
             await interaction.followup.send(f"⚠️ Queue is not configured")
             return
 
-        queue_data = config.get("twitch_ward_queue", [])
+        listner = self.bot.get_cog("QueueListener")
+        try:
+            user_id = await listner.skip_first(interaction.guild)
+        except discord.Forbidden:
+            await interaction.followup.send(
+                f"❌ Missing permission to move the user."
+            )
+            return
 
-        if not queue_data:
+        if user_id is None:
             await interaction.followup.send(f"ℹ️ No one is in the waiting room.")
             return
 
-        first_user_entry = queue_data[0]
-
-        # ✅ FIXED: use int directly
-        user_id = int(first_user_entry["user_id"])
-        username = first_user_entry["name"]
-
-        member = interaction.guild.get_member(user_id)
-
-        if (
-                member
-                and member.voice
-                and member.voice.channel
-                and member.voice.channel.id == config["waiting_channel_id"]
-        ):
-            try:
-                await member.move_to(None)
-            except discord.Forbidden:
-                await interaction.followup.send(
-                    f"❌ Missing permission to move the user."
-                )
-                return
-
-        # ✅ FIXED: match by int, not $numberLong
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$pull": {"twitch_ward_queue": {"user_id": user_id}}}
-        )
-
-        # Refresh config after update
-        new_config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
-
         await interaction.followup.send(
             f"⛔ Skipped <@{user_id}> from the waiting twitch_ward_queue."
         )
 
-        listner = QueueListener(self.bot)
-        await listner.move_next_user(guild=interaction.guild, config=new_config)
-        await listner.update_queue_display(interaction.guild, config=new_config)
-
     @app_commands.command(
         name="toggle_queue_auto", description="Enable or disable automatic twitch_ward_queue"
     )
     @app_commands.checks.has_permissions()
     async def toggle_queue_auto(self, interaction: discord.Interaction):
-        config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
+        config = await self.config_cache.get("twitch_ward", interaction.guild.id)
 
         if not config:
             await interaction.response.send_message(
@@ -204,25 +190,20 @@ class TwitchQueueCommands(commands.Cog):
 
         await  interaction.response.defer(ephemeral=True, thinking= True)
 
-        current = config.get("auto_fill_enabled", False) # Default to False if not set
+        current = config.auto_fill_enabled
         new_value = not current
-        await self.twitch_ward_config_collection.update_one(
-            {"_id": interaction.guild.id},
-            {"$set": {"auto_fill_enabled": new_value}},
-            upsert=True
+        new_config = await self.config_cache.update(
+            "twitch_ward",
+            interaction.guild.id,
+            {"$set": {"auto_fill_enabled": new_value}}
         )
 
-        # ✅ Refresh config from DB
-        new_config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
-
-        status = "disabled ❌" if not new_config.get("auto_fill_enabled", False) else "enabled ✅"
-
+        status = "disabled ❌" if not new_config.auto_fill_enabled else "enabled ✅"
 
-        listner = QueueListener(self.bot)
-        await listner.update_queue_display(interaction.guild, config=new_config)
 
-        if new_value:  # Now enabled, start processing
-            await listner.move_next_user(guild=interaction.guild, config=new_config)
+        listner = self.bot.get_cog("QueueListener")
+        # Now enabled, start processing
+        await listner.refresh_queue(interaction.guild, fill=new_value)
 
         await interaction.followup.send(
             f"Auto twitch_ward_queue filling has been **{status}**.", ephemeral=True
@@ -235,22 +216,25 @@ class TwitchQueueCommands(commands.Cog):
     async def twitch_ward(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        config = await self.twitch_ward_config_collection.find_one({"_id": interaction.guild.id})
+        config = await self.config_cache.get("twitch_ward", interaction.guild.id)
 
         if not config:
             await interaction.followup.send("⚠️ Twitch Ward is not configured for this server.")
             return
 
-        waiting_channel = self.bot.get_channel(config.get("waiting_channel_id"))
-        live_channel = self.bot.get_channel(config.get("live_channel_id"))
-        queue_log_channel = self.bot.get_channel(config.get("queue_log_channel"))
-        queue_display_channel = self.bot.get_channel(config.get("queue_text_channel_id"))
+        waiting_channel = self.bot.get_channel(config.waiting_channel_id)
+        live_channel = self.bot.get_channel(config.live_channel_id)
+        queue_log_channel = self.bot.get_channel(config.queue_log_channel)
+        queue_display_channel = self.bot.get_channel(config.queue_text_channel_id)
 
         description = ""
         description += f"**Waiting Room:** {waiting_channel.mention if waiting_channel else 'Not set'}\n"
         description += f"**Live Channel:** {live_channel.mention if live_channel else 'Not set'}\n"
         description += f"**Queue Log Channel:** {queue_log_channel.mention if queue_log_channel else 'Not set'}\n"
         description += f"**Queue Display Channel:** {queue_display_channel.mention if queue_display_channel else 'Not set'}\n"
+        tiers = sorted(config.priority_tiers.items(), key=lambda item: -item[1])
+        priorities = ", ".join(f"<@&{role_id}> ({tier})" for role_id, tier in tiers)
+        description += f"**Queue Priority:** {priorities or 'Not set'}\n"
 
         embed = discord.Embed(
             title="Twitch Ward Configuration",
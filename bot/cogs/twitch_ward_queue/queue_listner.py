@@ -1,11 +1,36 @@
+import asyncio
+from typing import Dict, List, Set, Tuple
+
 import discord
 from discord.ext import commands
 
+from bot.config import TwitchWardConfig, queue_render_window
+from bot.utils.paged_display import page_slice
+from bot.utils.render_scheduler import RenderScheduler
+
+# Members picked for the live room, with the queue entry to restore if the move fails
+FillPlan = List[Tuple[discord.Member, dict]]
+
 
 class QueueListener(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.twitch_ward_config_collection = self.bot.db.twitch_ward_config_collection
+        self.config_cache = self.bot.config_cache
+        self.render_scheduler = RenderScheduler(self.render_queue_display, window=queue_render_window)
+        self._moving: Dict[int, Set[int]] = {}  # guild id -> user ids with a live-room move in flight
+
+    async def cog_load(self):
+        self.bot.voice_router.register(self)
+
+    async def cog_unload(self):
+        self.bot.voice_router.unregister(self)
+        self.render_scheduler.cancel_all()
+
+    async def voice_channel_ids(self, guild: discord.Guild):
+        config = await self.config_cache.get("twitch_ward", guild.id)
+        if not config:
+            return []
+        return [cid for cid in (config.waiting_channel_id, config.live_channel_id) if cid]
 
     def is_owner_in_game_room(self, game_channel: discord.VoiceChannel, owner_id: int):
         return any(member.id == owner_id for member in game_channel.members)
@@ -13,17 +38,46 @@ class QueueListener(commands.Cog):
     def get_guest_count(self, game_channel: discord.VoiceChannel, owner_id: int):
         return len([m for m in game_channel.members if m.id != owner_id])
 
-    async def update_queue_display(self, guild: discord.Guild, config: dict):
-        queue_data = config.get("twitch_ward_queue", [])
-        queue_text_channel = self.bot.get_channel(config["queue_text_channel_id"])
-        is_auto_queue = bool(config.get("auto_fill_enabled", False))
+    def is_waiting(self, member: discord.Member, config: TwitchWardConfig) -> bool:
+        return bool(
+            member
+            and member.voice
+            and member.voice.channel
+            and member.voice.channel.id == config.waiting_channel_id
+        )
+
+    def queue_entry(self, member: discord.Member, config: TwitchWardConfig) -> dict:
+        """Queue entry for a member, carrying the highest tier among their roles."""
+        entry = {"user_id": member.id, "name": member.display_name}
+        tier = max((config.priority_tiers.get(role.id, 0) for role in member.roles), default=0)
+        if tier > 0:
+            entry["tier"] = tier
+        return entry
+
+    def request_queue_display(self, guild: discord.Guild):
+        """Schedule a coalesced refresh of the guild's queue display."""
+        self.render_scheduler.mark_dirty(guild)
+
+    async def render_queue_display(self, guild: discord.Guild):
+        config = await self.config_cache.get("twitch_ward", guild.id)
+        if config:
+            await self.update_queue_display(guild, config)
+
+    async def update_queue_display(self, guild: discord.Guild, config: TwitchWardConfig):
+        queue_data = self.bot.queues.get("twitch_ward", guild.id)
+        queue_text_channel = self.bot.get_channel(config.queue_text_channel_id)
+        is_auto_queue = config.auto_fill_enabled
 
+        _, shown = page_slice(queue_data, 0)
         display = (
                 "\n".join([
                     f"{i + 1}. <@{entry['user_id'] if isinstance(entry, dict) else entry[0]}>"
-                    for i, entry in enumerate(queue_data)
+                    f"{' ⭐' if isinstance(entry, dict) and entry.get('tier') else ''}"
+                    for i, entry in enumerate(shown)
                 ]) or "*Queue is empty*"
         )
+        if len(queue_data) > len(shown):
+            display += f"\n…and {len(queue_data) - len(shown)} more"
 
         embed = discord.Embed(
             title="🎮 Player Queue", description=display, color=discord.Color.green()
@@ -31,65 +85,154 @@ class QueueListener(commands.Cog):
         status = "enabled ✅" if is_auto_queue else "disabled ❌"
         embed.add_field(name="Status", value=f"{status.upper()}")
 
-        message_id = config.get("queue_embed_message_id")
-        if message_id:
-            try:
-                msg = await queue_text_channel.fetch_message(message_id)
-                await msg.edit(embed=embed)
-            except discord.NotFound:
-                new_msg = await queue_text_channel.send(embed=embed)
-                await self.twitch_ward_config_collection.update_one(
-                    {"_id": guild.id},
-                    {"$set": {"queue_embed_message_id": new_msg.id}},
-                    upsert=True
-                )
-        else:
-            msg = await queue_text_channel.send(embed=embed)
-            await self.twitch_ward_config_collection.update_one(
-                {"_id": guild.id},
-                {"$set": {"queue_embed_message_id": msg.id}},
-                upsert=True
+        async def persist_message_id(message_id: int):
+            await self.config_cache.update(
+                "twitch_ward",
+                guild.id,
+                {"$set": {"queue_embed_message_id": message_id}}
             )
 
-    async def move_next_user(self, guild: discord.Guild, config: dict):
-        game_channel = self.bot.get_channel(config["live_channel_id"])
-        queue_data = config.get("twitch_ward_queue", [])
+        await self.bot.displays.publish(
+            queue_text_channel,
+            guild.id,
+            "twitch_ward_queue",
+            config.queue_embed_message_id,
+            persist_message_id,
+            embed=embed
+        )
+
+    # Queue commands run on the guild's actor, so voice events, skips and
+    # resets apply one at a time and in order. Only the queue update and the
+    # choice of who to move happen on the actor; member moves and display
+    # refreshes run after it, so a slow Discord request never holds up the
+    # guild's other queue operations.
+
+    async def refresh_queue(self, guild: discord.Guild, fill: bool = False):
+        async def refresh():
+            config = await self.config_cache.get("twitch_ward", guild.id)
+            return config, self.plan_fill(guild, config) if config and fill else []
+
+        config, plan = await self.bot.queue_actor.run(guild.id, refresh)
+        self.request_queue_display(guild)
+        await self.fill(guild, config, plan)
+
+    async def reset_queue(self, guild: discord.Guild):
+        async def reset():
+            self.bot.queues.clear("twitch_ward", guild.id)
+
+        await self.bot.queue_actor.run(guild.id, reset)
+        self.request_queue_display(guild)
+
+    async def skip_first(self, guild: discord.Guild):
+        """
+        Disconnect the first waiting user and drop them from the queue.
+
+        Returns the skipped user id, or None if the queue was empty.
+        """
+        async def skip():
+            config = await self.config_cache.get("twitch_ward", guild.id)
+            first = self.bot.queues.first("twitch_ward", guild.id)
+            if not config or not first:
+                return None, None, []
+
+            user_id = int(first["user_id"])
+            self.bot.queues.remove("twitch_ward", guild.id, user_id)
+            return config, user_id, self.plan_fill(guild, config)
+
+        config, user_id, plan = await self.bot.queue_actor.run(guild.id, skip)
+        if user_id is None:
+            return None
+
+        self.request_queue_display(guild)
+        member = guild.get_member(user_id)
+        try:
+            if self.is_waiting(member, config):
+                await self.bot.actions.move(member, None)
+        finally:
+            await self.fill(guild, config, plan)
+        return user_id
+
+    def plan_fill(self, guild: discord.Guild, config: TwitchWardConfig, joining: discord.Member = None) -> FillPlan:
+        """
+        Pick queued members for every free guest slot in the live room and take
+        them off the queue in one update. Runs on the guild actor; `fill` then
+        moves them.
+
+        Free slots are counted once, less the moves still in flight. `joining`
+        is a member who just entered the waiting room and isn't queued yet;
+        they are picked too when the queue doesn't fill every slot.
+        """
+        game_channel = guild.get_channel(config.live_channel_id or 0)
         owner_id = guild.owner_id
 
-        if not self.is_owner_in_game_room(game_channel=game_channel, owner_id=owner_id):
+        if not game_channel or not self.is_owner_in_game_room(game_channel=game_channel, owner_id=owner_id):
             print("[SKIP] Owner not in game channel. Skipping move.")
-            return
+            return []
 
-        if not queue_data:
-            return
+        moving = self._moving.setdefault(guild.id, set())
+        free_slots = config.max_guests - self.get_guest_count(game_channel, owner_id) - len(moving)
+        if free_slots <= 0:
+            return []
 
-        for entry in queue_data:
+        plan = []
+        for entry in self.bot.queues.get("twitch_ward", guild.id):
+            if len(plan) == free_slots:
+                break
             member = guild.get_member(entry["user_id"])
-            if not member:
-                continue
+            # Stale entries (say, a missed leave) must not pull members in from other channels
+            if self.is_waiting(member, config):
+                plan.append((member, entry))
+        if joining and len(plan) < free_slots:
+            plan.append((joining, self.queue_entry(joining, config)))
+
+        self.bot.queues.remove_many("twitch_ward", guild.id, [member.id for member, _ in plan])
+        moving.update(member.id for member, _ in plan)
+        return plan
 
+    async def fill(self, guild: discord.Guild, config: TwitchWardConfig, plan: FillPlan):
+        """
+        Move the members picked by `plan_fill` into the live room.
+
+        All the moves are submitted together. Discord rate limits member moves
+        per guild, so the action scheduler's members bucket still sends them
+        one after another, without waiting on this loop in between. Members
+        whose move fails go back in the queue if they are still waiting.
+        """
+        if not plan:
+            return
+        game_channel = guild.get_channel(config.live_channel_id or 0)
+
+        async def move(member: discord.Member) -> bool:
             try:
-                await member.move_to(game_channel)
+                await self.bot.actions.move(member, game_channel)
                 print(f"[MOVE] Moved {member.name} to game room.")
+                return True
             except discord.HTTPException as e:
                 print(f"[ERROR] Couldn't move {member.name}: {e}")
-                continue
+                return False
 
-            log_channel = self.bot.get_channel(config["queue_log_channel"])
-            if log_channel:
-                await log_channel.send(f"➡️ Moved <@{member.id}> to Live Room.")
+        try:
+            results = await asyncio.gather(*(move(member) for member, _ in plan))
+        finally:
+            self._moving.get(guild.id, set()).difference_update(member.id for member, _ in plan)
 
-            await self.twitch_ward_config_collection.update_one(
-                {"_id": member.guild.id},
-                {"$pull": {"twitch_ward_queue": {"user_id": member.id}}}
-            )
-            # Fetch the updated config after modifying the twitch_ward_queue
-            updated_config = await self.twitch_ward_config_collection.find_one({"_id": guild.id})
-            await self.update_queue_display(guild, updated_config)
-            continue  # Only move one user at a time
+        log_channel = self.bot.get_channel(config.queue_log_channel)
+        failed = []
+        for (member, entry), ok in zip(plan, results):
+            if ok:
+                self.bot.log_sink.log(log_channel, f"➡️ Moved <@{member.id}> to Live Room.")
+            else:
+                failed.append((member, entry))
+        if failed:
+            await self.bot.queue_actor.run(guild.id, lambda: self.requeue(guild, config, failed))
+
+    async def requeue(self, guild: discord.Guild, config: TwitchWardConfig, failed: FillPlan):
+        for member, entry in failed:
+            if self.is_waiting(member, config):
+                self.bot.queues.push("twitch_ward", guild.id, entry)
+        self.request_queue_display(guild)
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(
+    async def handle_voice_update(
             self,
             member: discord.Member,
             before: discord.VoiceState,
@@ -98,61 +241,74 @@ class QueueListener(commands.Cog):
         if member.bot:
             return
 
-        config = await self.twitch_ward_config_collection.find_one({"_id": member.guild.id})
+        config, plan = await self.bot.queue_actor.run(
+            member.guild.id, lambda: self.apply_voice_update(member, before, after)
+        )
+        await self.fill(member.guild, config, plan)
+
+    async def apply_voice_update(
+            self,
+            member: discord.Member,
+            before: discord.VoiceState,
+            after: discord.VoiceState,
+    ) -> Tuple[TwitchWardConfig, FillPlan]:
+        """Apply a voice event to the queue; returns the config and the members to move."""
+        config = await self.config_cache.get("twitch_ward", member.guild.id)
         if not config:
-            return
+            return config, []
 
-        waiting_channel_id = config["waiting_channel_id"]
-        game_channel_id = config["live_channel_id"]
+        waiting_channel_id = config.waiting_channel_id
+        game_channel_id = config.live_channel_id
         owner_id = member.guild.owner_id
-        max_guests = config.get("max_guests", 3)
-        auto_fill = config.get("auto_fill_enabled", False)
+        max_guests = config.max_guests
+        auto_fill = config.auto_fill_enabled
 
         game_channel = self.bot.get_channel(game_channel_id)
+        plan = []
 
         # ➕ Joined waiting room
         if after.channel and after.channel.id == waiting_channel_id:
             print(f"[JOIN] {member.name} joined waiting room.")
-            print(f"Queue before join: {config.get('twitch_ward_queue', [])}")
-            await self.twitch_ward_config_collection.update_one(
-                {"_id": member.guild.id},
-                {"$push": {"twitch_ward_queue": {"user_id": member.id, "name": member.display_name}}},
-                upsert=True
-            )
-            config = await self.twitch_ward_config_collection.find_one({"_id": member.guild.id})
-            print(f"Queue after join: {config.get('twitch_ward_queue', [])}")
-            await self.update_queue_display(member.guild, config)
-
             if (
                     auto_fill
                     and game_channel
                     and self.is_owner_in_game_room(game_channel, owner_id)
                     and self.get_guest_count(game_channel, owner_id) < max_guests
             ):
-                await self.move_next_user(member.guild, config)
+                # Fill first, so a joiner who gets a free slot is never queued
+                plan = self.plan_fill(member.guild, config, joining=member)
+            picked = any(picked.id == member.id for picked, _ in plan)
+            queued = not picked and self.bot.queues.push(
+                "twitch_ward", member.guild.id, self.queue_entry(member, config)
+            )
+            if queued:
+                position = self.bot.queues.position("twitch_ward", member.guild.id, member.id)
+                print(f"[QUEUE] {member.name} is #{position} in the queue.")
+            # Picking just the joiner leaves the queue, and so the display, unchanged
+            if queued or len(plan) > picked:
+                self.request_queue_display(member.guild)
 
         # ➖ Left waiting room
         elif before.channel and before.channel.id == waiting_channel_id:
             print(f"[LEAVE] {member.name} left waiting room.")
-            print(f"Queue before leave: {config.get('twitch_ward_queue', [])}")
-            await self.twitch_ward_config_collection.update_one(
-                {"_id": member.guild.id},
-                {"$pull": {"twitch_ward_queue": {"user_id": member.id}}}
-            )
-            config = await self.twitch_ward_config_collection.find_one({"_id": member.guild.id})
-            print(f"Queue after leave: {config.get('twitch_ward_queue', [])}")
-            await self.update_queue_display(member.guild, config)
+            # Users picked for the live room were already taken off the queue
+            if self.bot.queues.remove("twitch_ward", member.guild.id, member.id):
+                print(f"[QUEUE] {self.bot.queues.size('twitch_ward', member.guild.id)} left in the queue.")
+                self.request_queue_display(member.guild)
 
         # 🧑‍💼 Owner joined game → try to fill
         elif (
                 after.channel
                 and after.channel.id == game_channel_id
                 and member.id == owner_id
+                and game_channel
                 and self.get_guest_count(game_channel, owner_id) < max_guests
         ):
             print(f"[Owner] Owner joined the game channel")
-            if auto_fill and game_channel:
-                await self.move_next_user(member.guild, config=config)
+            if auto_fill:
+                plan = self.plan_fill(member.guild, config)
+                if plan:
+                    self.request_queue_display(member.guild)
 
         # 🔁 Left game room → try to refill
         elif before.channel and before.channel.id == game_channel_id:
@@ -162,4 +318,8 @@ class QueueListener(commands.Cog):
                     and self.is_owner_in_game_room(game_channel, owner_id)
                     and self.get_guest_count(game_channel, owner_id) < max_guests
             ):
-                await self.move_next_user(member.guild, config)
+                plan = self.plan_fill(member.guild, config)
+                if plan:
+                    self.request_queue_display(member.guild)
+
+        return config, plan
@@ -1,7 +1,11 @@
-from bot.cogs.vc_moderation.vc_moderation_cog import VCModerationCog
-from bot.cogs.vc_moderation.moderation_commands import ModerationCommands
+# Kick votes need voice states; quarantine reads and edits member roles, kept
+# current by member updates
+intents = {"voice_states", "members"}
 
 
 async def setup(bot):
-    await  bot.add_cog(VCModerationCog(bot = bot))
-    await  bot.add_cog(ModerationCommands(bot = bot))
\ No newline at end of file
+    from bot.cogs.vc_moderation.vc_moderation_cog import VCModerationCog
+    from bot.cogs.vc_moderation.moderation_commands import ModerationCommands
+
+    await bot.add_cog(VCModerationCog(bot=bot))
+    await bot.add_cog(ModerationCommands(bot=bot))
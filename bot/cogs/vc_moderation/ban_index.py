@@ -0,0 +1,65 @@
+from typing import Dict, List, Set
+
+
+class BanIndex:
+    """
+    In-memory mirror of the `vc_blocks` collection.
+
+    Maps voice channel id -> banned user ids (and the reverse), so ban checks on
+    every voice join are a set lookup. Loaded once at startup; every write goes
+    to MongoDB first and is then applied to the index.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._banned: Dict[int, Set[int]] = {}
+        self._channels_by_user: Dict[int, Set[int]] = {}
+
+    async def load(self):
+        banned = {}
+        channels_by_user = {}
+        async for doc in self.collection.find({}, {"voice_channel_id": 1, "banned_user_ids": 1}):
+            channel_id = doc.get("voice_channel_id")
+            if not channel_id:
+                continue
+            user_ids = set(doc.get("banned_user_ids", []))
+            banned[channel_id] = user_ids
+            for user_id in user_ids:
+                channels_by_user.setdefault(user_id, set()).add(channel_id)
+        self._banned = banned
+        self._channels_by_user = channels_by_user
+        print(f"Loaded VC bans for {len(banned)} channels")
+
+    def is_banned(self, channel_id: int, user_id: int) -> bool:
+        return user_id in self._banned.get(channel_id, ())
+
+    def channels_for(self, user_id: int) -> List[int]:
+        return list(self._channels_by_user.get(user_id, ()))
+
+    async def ban(self, guild_id: int, channel_id: int, user_id: int):
+        await self.collection.update_one(
+            {"voice_channel_id": channel_id},
+            {"$addToSet": {"banned_user_ids": user_id}, "$set": {"guild_id": guild_id}},
+            upsert=True
+        )
+        self._banned.setdefault(channel_id, set()).add(user_id)
+        self._channels_by_user.setdefault(user_id, set()).add(channel_id)
+
+    async def unban_everywhere(self, user_id: int) -> int:
+        """Remove a user from every channel's ban list. Returns the number of lists changed."""
+        result = await self.collection.update_many(
+            {"banned_user_ids": user_id},
+            {"$pull": {"banned_user_ids": user_id}}
+        )
+        for channel_id in self._channels_by_user.pop(user_id, ()):
+            self._banned.get(channel_id, set()).discard(user_id)
+        return result.modified_count
+
+    def forget_channel(self, channel_id: int):
+        """Drop a channel whose document has been deleted."""
+        for user_id in self._banned.pop(channel_id, ()):
+            channels = self._channels_by_user.get(user_id)
+            if channels:
+                channels.discard(channel_id)
+                if not channels:
+                    del self._channels_by_user[user_id]
@@ -0,0 +1,70 @@
+from typing import Callable, Dict, Iterable, List
+
+from pymongo import DeleteMany, UpdateMany
+
+
+class ChannelSweeper:
+    """
+    Removes documents keyed by `voice_channel_id` whose channel no longer exists.
+
+    The collection is streamed in batches of `batch_size`, so memory use does not
+    depend on its size. Each batch is grouped by `guild_id` and checked against
+    that guild's channel cache, then settled with a single `bulk_write`. Documents
+    for guilds the bot can't currently see are left alone. Older documents
+    without a `guild_id` are resolved through the global channel cache and get
+    one backfilled.
+    """
+
+    def __init__(self, bot, batch_size: int = 500):
+        self.bot = bot
+        self.batch_size = batch_size
+
+    async def sweep(self, collection, forget: Callable[[Iterable[int]], None]) -> int:
+        """Sweep one collection; `forget` is called with each batch's deleted channel ids."""
+        # Without a guild_id, a missing channel only proves anything if every guild is visible
+        can_resolve_unowned = not any(guild.unavailable for guild in self.bot.guilds)
+        deleted = 0
+        batch = []
+        cursor = collection.find({}, {"voice_channel_id": 1, "guild_id": 1}).batch_size(self.batch_size)
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                deleted += await self._settle(collection, batch, can_resolve_unowned, forget)
+                batch = []
+        if batch:
+            deleted += await self._settle(collection, batch, can_resolve_unowned, forget)
+        return deleted
+
+    async def _settle(self, collection, batch: List[dict], can_resolve_unowned: bool, forget) -> int:
+        by_guild: Dict[int, List[dict]] = {}
+        for doc in batch:
+            by_guild.setdefault(doc.get("guild_id"), []).append(doc)
+
+        stale_ids = []
+        stale_channels = []
+        backfill: Dict[int, List] = {}
+        for guild_id, docs in by_guild.items():
+            guild = self.bot.get_guild(guild_id) if guild_id else None
+            if guild_id and (guild is None or guild.unavailable):
+                continue
+            for doc in docs:
+                channel_id = doc.get("voice_channel_id")
+                channel = guild.get_channel(channel_id) if guild else self.bot.get_channel(channel_id)
+                if channel is not None:
+                    if guild is None:
+                        backfill.setdefault(channel.guild.id, []).append(doc["_id"])
+                elif guild is not None or can_resolve_unowned:
+                    stale_ids.append(doc["_id"])
+                    stale_channels.append(channel_id)
+
+        requests = [UpdateMany({"_id": {"$in": ids}}, {"$set": {"guild_id": guild_id}})
+                    for guild_id, ids in backfill.items()]
+        if stale_ids:
+            requests.append(DeleteMany({"_id": {"$in": stale_ids}}))
+        if not requests:
+            return 0
+
+        result = await collection.bulk_write(requests, ordered=False)
+        if stale_channels:
+            forget(stale_channels)
+        return result.deleted_count
@@ -4,13 +4,22 @@ from discord.ext import commands
 from idna import check_nfc
 from typing_extensions import override
 
+from bot.storage.repositories import KickCountRepository
+
 
 class ModerationCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.user_collection = self.bot.db.users
-        self.guild_collection = self.bot.db.guild_config
-        self.vc_blocks = self.bot.db.vc_blocks
+        self.kick_counts = KickCountRepository(self.bot.db.users)
+        self.config_cache = self.bot.config_cache
+
+    async def remove_member_overwrite(self, channel: discord.abc.GuildChannel, member_id: int):
+        # Members outside voice aren't cached, so their overwrite is keyed by
+        # a discord.Object rather than the Member; match on id
+        overrides = channel.overwrites
+        kept = {target: ow for target, ow in overrides.items() if target.id != member_id}
+        if len(kept) != len(overrides):
+            await channel.edit(overwrites=kept)
 
     @app_commands.command(name="remove_quarantine", description="Remove quarantine from a user who got banned twice in a voice channel.")
     @app_commands.checks.has_permissions(administrator = True)
@@ -22,13 +31,7 @@ class ModerationCommands(commands.Cog):
         # Defer the interaction to prevent timeout
         await interaction.response.defer(thinking=True, ephemeral=True)
 
-        user_data = await self.user_collection.find_one({"_id": member.id})
-
-        print(f"User data {user_data}")
-
-        kick_object = user_data.get("kick_counts", {})
-        print(f"Kick Object : {kick_object}")
-        roles_id = kick_object.get("previous_roles", [])
+        roles_id = await self.kick_counts.previous_roles(member.id)
         print(f"Roles id {roles_id}")
 
         roles = [ discord.utils.get(interaction.guild.roles, id = rid) for rid in roles_id]
@@ -43,29 +46,19 @@ class ModerationCommands(commands.Cog):
         if roles:
             await  member.add_roles(*roles, reason="Restoring roles after VC mute lifted")
 
-        # 🧠 Get all documents where user is banned in voice channel
-        banned_channels = await self.vc_blocks.find({"banned_user_ids": member.id}).to_list(length=None)
+        ban_index = self.bot.get_cog("VCModerationCog").ban_index
 
-        for doc in banned_channels:
-            channel_id = doc["voice_channel_id"]
+        # 🧠 Get all voice channels where user is banned
+        for channel_id in ban_index.channels_for(member.id):
             channel= interaction.guild.get_channel(channel_id)
 
             if channel:
-                overrides = channel.overwrites
-                if member in overrides:
-                    del overrides[member]
-                    await  channel.edit(overwrites=overrides)
+                await self.remove_member_overwrite(channel, member.id)
 
         # --- Remove user from all banned_user_ids arrays ---
-        await self.vc_blocks.update_many(
-            {"banned_user_ids": member.id},  # Match any doc where this user is banned
-            {"$pull": {"banned_user_ids": member.id}}  # Remove user ID from array
-        )
+        await ban_index.unban_everywhere(member.id)
 
-        await self.user_collection.update_one(
-            {"_id": member.id},
-            {"$unset": {f"kick_counts.previous_role": ""}}
-        )
+        await self.kick_counts.clear_previous_roles(member.id)
 
         await interaction.followup.send(f"✅ Quarantine removed from {member.mention}", ephemeral=True)
 
@@ -75,10 +68,10 @@ class ModerationCommands(commands.Cog):
         if not channel:
             channel = interaction.channel
 
-        await self.guild_collection.update_one(
-            {"guild_id": interaction.guild.id},
-            {"$set":{"mod_log_channel_id": channel.id}},
-            upsert= True
+        await self.config_cache.update(
+            "moderation",
+            interaction.guild.id,
+            {"$set":{"mod_log_channel_id": channel.id}}
         )
 
         await  interaction.response.send_message(f"{channel.mention} has been set for Moderation Logs", ephemeral= True)
@@ -120,48 +113,31 @@ class ModerationCommands(commands.Cog):
     async def reset_ban(self, interaction: discord.Interaction, member: discord.Member):
         await interaction.response.defer(ephemeral=True, thinking= True)
 
-        docs = await  self.user_collection.find_one({"_id": member.id})
-
-        if not docs:
+        if not await self.kick_counts.reset(member.id):
             await interaction.followup.send(f"{member.mention} not found in banned list")
             return
 
-        reset = await self.user_collection.update_one(
-            {"_id": member.id},
-            {"$set":{"kick_counts.count":0}},
-            upsert= True
-        )
-
 
 
-        channel_doc = await  self.vc_blocks.find_one(
-            {"banned_user_ids": member.id}
-        )
+        ban_index = self.bot.get_cog("VCModerationCog").ban_index
 
-        channel_id = channel_doc["voice_channel_id"]
-        channel = interaction.guild.get_channel(channel_id)
+        for channel_id in ban_index.channels_for(member.id):
+            channel = interaction.guild.get_channel(channel_id)
+            if not channel:
+                continue
 
-        overrides = channel.overwrites
-        if member in overrides:
-            del overrides[member]
-            await channel.edit(overwrites=overrides)
+            await self.remove_member_overwrite(channel, member.id)
 
         # --- Remove user from all banned_user_ids arrays ---
-        remove_channel_ban = await self.vc_blocks.update_many(
-            {"banned_user_ids": member.id},  # Match any doc where this user is banned
-            {"$pull": {"banned_user_ids": member.id}}  # Remove user ID from array
-        )
+        removed_bans = await ban_index.unban_everywhere(member.id)
 
         # --- Send feedback ---
-        if reset.modified_count > 0 or reset.upserted_id is not None:
-            msg = f"✅ Reset ban count for {member.mention}."
-            if remove_channel_ban.modified_count > 0:
-                msg += f" Also removed from {remove_channel_ban.modified_count} voice channel ban list(s)."
-            else:
-                msg += " No VC ban entries were found."
-            await interaction.followup.send(msg)
+        msg = f"✅ Reset ban count for {member.mention}."
+        if removed_bans > 0:
+            msg += f" Also removed from {removed_bans} voice channel ban list(s)."
         else:
-            await interaction.followup.send(f"⚠️ Failed to reset ban count for {member.mention}.")
+            msg += " No VC ban entries were found."
+        await interaction.followup.send(msg)
 
 
 
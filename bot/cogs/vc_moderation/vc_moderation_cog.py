@@ -1,11 +1,18 @@
 import asyncio
 import math
-from collections import defaultdict
 
 import discord
 from discord.ext import commands
 from typing_extensions import override
 
+from bot.cogs.vc_moderation.ban_index import BanIndex
+from bot.cogs.vc_moderation.channel_sweeper import ChannelSweeper
+from bot.cogs.vc_moderation.vc_roster import ChannelRoster
+from bot.storage.repositories import EmbedRepository, KickCountRepository
+from bot.utils.action_scheduler import Priority
+from bot.utils.paged_display import PAGE_SIZE, PagedDisplayView, page_count, page_slice
+from bot.utils.render_scheduler import RenderScheduler
+
 
 class KickReasonModal(discord.ui.Modal, title='Kick Reason'):
     reason = discord.ui.TextInput(label='Reason', style=discord.TextStyle.short)
@@ -28,10 +35,10 @@ class KickReasonModal(discord.ui.Modal, title='Kick Reason'):
         vote_embed.add_field(name="Reason", value=self.reason.value)
         vote_embed.add_field(name="Yes Votes", value=0, inline=True)
         vote_embed.add_field(name="No Votes", value=0, inline=True)
-        message = await self.channel.send(embed=vote_embed, view=vote_view)
+        message = await self.cog.bot.actions.send(self.channel, Priority.VOTE, embed=vote_embed, view=vote_view)
         vote_view.message = message
         channel = await self.cog.log_kick_vote(interaction.guild)
-        await channel.send(f"Vote to kick {self.target_user.mention} started by {interaction.user.mention}.")
+        self.cog.bot.log_sink.log(channel, f"Vote to kick {self.target_user.mention} started by {interaction.user.mention}.")
         await interaction.response.send_message("Vote started!", ephemeral=True)
 
 
@@ -43,32 +50,79 @@ class KickVoteView(discord.ui.View):
         self.channel: discord.VoiceChannel = channel
         self.target_user = target_user
         self.reason = reason
-        self.votes = defaultdict(lambda: None)
+        self.votes = {}
+        self.yes_votes = 0
+        self.no_votes = 0
+        self.finished = False
         self.message = None
+        self._checks = set()  # running check_outcome tasks, kept so they aren't garbage-collected
+
+    def _get_eligible_voters(self):
+        # channel.members is served from the gateway voice state cache
+        return {member.id for member in self.channel.members if
+                not member.bot and member.id != self.target_user.id and member.id != self.guild.owner_id}
+
+    def outcome(self):
+        """True once the vote has passed, False once it can no longer pass, None while undecided."""
+        eligible = self._get_eligible_voters()
+        required = math.ceil(len(eligible) * 0.6)
+        if required == 0:
+            # Nobody left who could vote: the vote fails rather than passing unopposed
+            return False
+        if self.yes_votes >= required:
+            return True
+        outstanding = len(eligible - self.votes.keys())
+        if self.yes_votes + outstanding < required:
+            return False
+        return None
+
+    async def check_outcome(self):
+        """Finish the vote early as soon as its result can no longer change."""
+        if not self.finished and self.message and self.outcome() is not None:
+            self.stop()
+            await self.finalize_vote()
 
-    async def required_votes(self):
-        return math.ceil(len(await self._get_eligible_voters()) * 0.6)
+    def schedule_check(self):
+        """Run `check_outcome` in the background, e.g. from a voice event that must not wait on it."""
+        task = asyncio.create_task(self.check_outcome())
+        self._checks.add(task)
+        task.add_done_callback(self._check_done)
 
-    async def _get_eligible_voters(self):
-        updated_channel = await self.guild.fetch_channel(self.channel.id)
-        return [member.id for member in updated_channel.members if
-                not member.bot and member.id != self.target_user.id and member.id != self.guild.owner_id]
+    def _check_done(self, task: asyncio.Task):
+        self._checks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error checking kick vote in {self.channel.id}: {task.exception()!r}")
 
     async def on_timeout(self):
         if self.message:
             await self.finalize_vote()
 
     async def finalize_vote(self):
-        if not self.message:
+        if self.finished or not self.message:
             return
+        self.finished = True
+        try:
+            await self.report_result()
+        finally:
+            # Free the channel for new votes even if acting on the result failed
+            self.cog.active_votes.pop(self.channel.id, None)
 
-        yes_votes = sum(1 for vote in self.votes.values() if vote is True)
-        no_votes = sum(1 for vote in self.votes.values() if vote is False)
+        # Cleanup message after delay
+        await asyncio.sleep(10)
+        try:
+            await self.message.delete()
+        except discord.NotFound:
+            pass
+
+    async def report_result(self):
+        """Act on the outcome, log it and show it on the vote message."""
+        yes_votes = self.yes_votes
+        no_votes = self.no_votes
         channel = await self.cog.log_kick_vote(self.guild)
 
         result_embed = discord.Embed(title="Vote Failed")
 
-        if yes_votes >= await self.required_votes():
+        if self.outcome() is True:
             result_embed.title = "Vote Passed"
             result_embed.color = discord.Color.green()
             result_embed.description = f"✅ Vote passed. {self.target_user.mention} will be acted upon."
@@ -79,48 +133,34 @@ class KickVoteView(discord.ui.View):
                 user_id = self.target_user.id
 
                 # Update VC block list
-                await self.cog.vc_blocks.update_one(
-                    {"voice_channel_id": self.channel.id},
-                    {"$addToSet": {"banned_user_ids": user_id}},
-                    upsert=True
-                )
+                await self.cog.ban_index.ban(self.channel.guild.id, self.channel.id, user_id)
 
-                banned_user = self.guild.get_member(user_id)
-                overrides = self.channel.overwrites
-                overrides[banned_user] = discord.PermissionOverwrite(connect = False, view_channel = False)
+                # Only voice members are cached, so key the overwrite by the
+                # target we already hold; an uncached overwrite for the same
+                # user comes back as a discord.Object and is replaced
+                overrides = {target: ow for target, ow in self.channel.overwrites.items() if target.id != user_id}
+                overrides[self.target_user] = discord.PermissionOverwrite(connect = False, view_channel = False)
 
                 await  self.channel.edit(overwrites= overrides)
 
                 # Increment kick count
-                await self.cog.user_collection.update_one(
-                    {"_id": user_id},
-                    {
-                        "$inc": {"kick_counts.count": 1},
-                        "$set": {"kick_counts.last_kicked_at": discord.utils.utcnow()}
-                    },
-                    upsert=True
-                )
-
-                # Fetch updated user data
-                user_doc = await self.cog.user_collection.find_one({"_id": user_id})
-                kick_data = user_doc.get("kick_counts", {})
-                kick_count = kick_data.get("count", 0)
+                kick_count = await self.cog.kick_counts.record_kick(user_id)
 
                 # 1st kick → move to AFK (if exists), else disconnect
                 if kick_count == 1:
                     afk_channel = self.guild.afk_channel
                     if afk_channel:
-                        await self.target_user.move_to(afk_channel, reason="First VC kick – moved to AFK")
+                        await self.cog.bot.actions.move(self.target_user, afk_channel, reason="First VC kick – moved to AFK")
                         result_embed.description += f"\n➡️ {self.target_user.mention} has been moved to AFK."
                     else:
-                        await self.target_user.move_to(None, reason="First VC kick – disconnected (no AFK channel)")
+                        await self.cog.bot.actions.move(self.target_user, None, reason="First VC kick – disconnected (no AFK channel)")
                         result_embed.description += f"\n➡️ {self.target_user.mention} has been disconnected (no AFK channel)."
 
                 # 2nd+ kick → mute, remove roles, etc.
                 elif kick_count >= 2:
 
                     try:
-                        await self.target_user.move_to(None, reason="Second VC kick – disconnected & muted")
+                        await self.cog.bot.actions.move(self.target_user, None, reason="Second VC kick – disconnected & muted")
                         result_embed.description += f"\n➡️ {self.target_user.mention} has been disconnected from VC."
                     except discord.HTTPException as e:
                         result_embed.description += f"\n⚠️ Failed to disconnect user: {e}"
@@ -150,60 +190,41 @@ class KickVoteView(discord.ui.View):
                         await self.target_user.add_roles(muted_role, reason="Muted after 2 VC kicks")
 
                         # Reset kick count & save old roles
-                        await self.cog.user_collection.update_one(
-                            {"_id": user_id},
-                            {
-                                "$set": {
-                                    "kick_counts.count": 0,
-                                    "kick_counts.previous_roles": role_ids
-                                }
-                            }
-                        )
+                        await self.cog.kick_counts.quarantine(user_id, role_ids)
 
                         result_embed.description += f"\n🚫 {self.target_user.mention} has been muted and roles removed."
 
                     except discord.HTTPException as e:
                         result_embed.description += f"\n⚠️ Failed to assign mute role: {e}"
 
-                await channel.send(f"{self.guild.owner.mention} <@&1304100217091653642>", embed=result_embed)
+                self.cog.bot.actions.send(channel, content=f"<@{self.guild.owner_id}> <@&1304100217091653642>", embed=result_embed)
 
             except discord.HTTPException as e:
                 result_embed.description += f"\n⚠️ Failed to move user: {e}"
-                await channel.send(embed=result_embed)
+                self.cog.bot.actions.send(channel, embed=result_embed)
 
         else:
             # Vote failed
             result_embed.title = "Vote Failed"
             result_embed.color = discord.Color.red()
             result_embed.description = f"The vote to kick {self.target_user.mention} failed."
-            await channel.send(embed=result_embed)
+            self.cog.bot.actions.send(channel, embed=result_embed)
 
         # Add votes count fields
         result_embed.add_field(name="👍 Yes Votes", value=yes_votes)
         result_embed.add_field(name="👎 No Votes", value=no_votes)
 
         # Edit original message
-        await self.message.edit(embed=result_embed, view=None)
-        self.cog.active_votes.pop(self.channel.id, None)
-
-        # Cleanup message after delay
-        await asyncio.sleep(10)
-        try:
-            await self.message.delete()
-        except discord.NotFound:
-            pass
+        await self.cog.bot.actions.edit_message(self.message, Priority.VOTE, embed=result_embed, view=None)
 
     async def update_vote_embed(self):
-        yes_votes = sum(1 for vote in self.votes.values() if vote is True)
-        no_votes = sum(1 for vote in self.votes.values() if vote is False)
-
         embed = self.message.embeds[0]
         for i, field in enumerate(embed.fields):
             if field.name == "Yes Votes":
-                embed.set_field_at(i, name="Yes Votes", value=yes_votes, inline=True)
+                embed.set_field_at(i, name="Yes Votes", value=self.yes_votes, inline=True)
             elif field.name == "No Votes":
-                embed.set_field_at(i, name="No Votes", value=no_votes, inline=True)
-        await self.message.edit(embed=embed)
+                embed.set_field_at(i, name="No Votes", value=self.no_votes, inline=True)
+        await self.cog.bot.actions.edit_message(self.message, Priority.VOTE, embed=embed)
 
     @discord.ui.button(label="Yes", style=discord.ButtonStyle.success)
     async def yes_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -227,89 +248,127 @@ class KickVoteView(discord.ui.View):
             return
 
         self.votes[interaction.user.id] = vote_value
+        if vote_value:
+            self.yes_votes += 1
+        else:
+            self.no_votes += 1
         await interaction.response.send_message(f"You voted {'Yes' if vote_value else 'No'}.", ephemeral=True)
-        await self.update_vote_embed()
 
-        eligible = await self._get_eligible_voters()
-        if all(uid in self.votes for uid in eligible):
-            await self.finalize_vote()
-            self.stop()
+        if self.outcome() is None:
+            await self.update_vote_embed()
+        else:
+            await self.check_outcome()
+
+
+class VCRosterView(PagedDisplayView):
+    def __init__(self, page: int = 0, pages: int = 1, options=()):
+        super().__init__("vc_roster", "Start a vote to kick a member", page, pages, options)
+
+    async def on_page(self, interaction: discord.Interaction, delta: int):
+        cog = interaction.client.get_cog("VCModerationCog")
+        if cog:
+            await cog.turn_roster_page(interaction, delta)
+
+    async def on_target(self, interaction: discord.Interaction, user_id: int):
+        cog = interaction.client.get_cog("VCModerationCog")
+        if cog:
+            await cog.start_kick_vote(interaction, user_id)
 
 
 class VCModerationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.vc_blocks = self.bot.db.vc_blocks
+        self.ban_index = BanIndex(self.vc_blocks)
         self.vc_embeds = self.bot.db.vc_embeds
-        self.guild_collection = self.bot.db.guild_config
-        self.user_collection = self.bot.db.users
+        self.config_cache = self.bot.config_cache
+        self.kick_counts = KickCountRepository(self.bot.db.users)
+        self.embeds = EmbedRepository(self.vc_embeds)
         self.active_votes = {}
-        self._creating_embed_for_channel = set()
+        self.rosters = {}
+        self.embed_message_ids = {}
+        self.embed_renderer = RenderScheduler(self.render_vc_embed, window=0)
+        self.sweeper = ChannelSweeper(self.bot)
         self.bot.scheduler.add_job(
-            self.delete_chanel,
+            self.sweep_stale_channels,
             "interval",
-            hours=5
+            hours=5,
+            id="vc_stale_channel_sweep",
+            replace_existing=True
         )
 
-    async def delete_chanel(self):
-        asyncio.create_task(self.check_channel_exist(collection=self.vc_embeds))
-        asyncio.create_task(self.check_channel_exist(collection=self.vc_blocks))
-
-    async def check_channel_exist(self, collection):
-        # Fetch all VC block entries
-        vc_block_channels = await collection.find({}).to_list(length=None)
-
-        for entry in vc_block_channels:
-            channel_id = entry.get("voice_channel_id")
-            guild = self.bot.get_guild(1304100216944853013)
+    async def sweep_stale_channels(self):
+        """Drop ban lists and member embeds of voice channels that have been deleted."""
+        deleted = await self.sweeper.sweep(self.vc_embeds, self.forget_embeds)
+        deleted += await self.sweeper.sweep(self.vc_blocks, self.forget_bans)
+        if deleted:
+            print(f"✅ Deleted {deleted} DB entries for missing VCs")
 
-            if not guild:
-                continue
+    def forget_embeds(self, channel_ids):
+        for channel_id in channel_ids:
+            self.rosters.pop(channel_id, None)
+            self.embed_message_ids.pop(channel_id, None)
 
-            # Check if the voice channel exists in the guild
-            channel = guild.get_channel(channel_id)
-            if not channel:
-                # Voice channel no longer exists — remove the document from DB
-                result = await collection.delete_one({"_id": entry["_id"]})
-                if result.deleted_count > 0:
-                    print(f"✅ Deleted DB entry for missing VC: {channel_id}")
+    def forget_bans(self, channel_ids):
+        for channel_id in channel_ids:
+            self.ban_index.forget_channel(channel_id)
 
     async def log_kick_vote(self, guild):
-        doc = await self.guild_collection.find_one({"guild_id": guild.id})
-        channel_id = doc.get("mod_log_channel_id", 1395972057635749958)
+        config = await self.config_cache.get("moderation", guild.id)
+        channel_id = config.mod_log_channel_id if config and config.mod_log_channel_id else 1395972057635749958
         log_channel = guild.get_channel(channel_id)
         if isinstance(log_channel, discord.TextChannel):
             return log_channel
         return None
 
-    @commands.Cog.listener()
-    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+    async def cog_load(self):
+        await self.ban_index.load()
+        self.embed_message_ids = await self.embeds.message_ids()
+        self.bot.voice_router.register(self)
+        self.bot.add_view(VCRosterView())
+
+    async def cog_unload(self):
+        self.bot.voice_router.unregister(self)
+        self.embed_renderer.cancel_all()
+
+    async def voice_channel_ids(self, guild: discord.Guild):
+        # Every channel gets a member embed, except the AFK channel
+        afk_channel = guild.afk_channel
+        return [c.id for c in guild.voice_channels + guild.stage_channels if c != afk_channel]
+
+    async def handle_voice_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.bot:
             return
 
+        # Someone joining or leaving can decide a running kick vote
+        for channel in (before.channel, after.channel):
+            vote = self.active_votes.get(channel.id) if channel else None
+            if vote:
+                vote.schedule_check()
+
         async def disconnect_bots_if_alone(channel: discord.VoiceChannel):
             if not any(not m.bot for m in channel.members):
                 for m in channel.members:
                     if m.bot:
                         try:
-                            await m.move_to(None, reason="No human users left in the voice channel.")
+                            await self.bot.actions.move(m, None, reason="No human users left in the voice channel.")
                         except discord.HTTPException:
                             pass
 
+        if before.channel:
+            self.roster_for(before.channel).remove(member.id)
+
         # User left VC
         if before.channel and not after.channel:
             await disconnect_bots_if_alone(before.channel)
-            if not before.channel.members:
-                await self.cleanup_vc_embed(before.channel)
-            else:
-                await self.update_vc_embed(before.channel)
+            self.update_vc_embed(before.channel)
 
         # User switched VC
         elif before.channel and after.channel and before.channel != after.channel:
-            if await self.is_user_banned(member, after.channel):
+            if self.is_user_banned(member, after.channel):
                 try:
                     channel_name = after.channel.name if after.channel else "an unknown voice channel"
-                    await member.move_to(None, reason="Banned from this voice channel.")
+                    await self.bot.actions.move(member, None, reason="Banned from this voice channel.")
                     await member.send(f"You are banned from the voice channel: {channel_name}")
                 except discord.HTTPException:
                     pass
@@ -317,12 +376,10 @@ class VCModerationCog(commands.Cog):
 
             await disconnect_bots_if_alone(before.channel)
 
-            if not before.channel.members:
-                await self.cleanup_vc_embed(before.channel)
-            else:
-                await self.update_vc_embed(before.channel)
+            self.update_vc_embed(before.channel)
 
-            await self.update_vc_embed(after.channel)
+            self.roster_for(after.channel).add(member)
+            self.update_vc_embed(after.channel)
 
         # User joined a VC directly
         elif not before.channel and after.channel:
@@ -336,82 +393,105 @@ class VCModerationCog(commands.Cog):
             if not final_channel:
                 return
 
-            if await self.is_user_banned(member, final_channel):
+            if self.is_user_banned(member, final_channel):
                 try:
-                    await member.move_to(None, reason="Banned from this voice channel.")
+                    await self.bot.actions.move(member, None, reason="Banned from this voice channel.")
                     await member.send(f"You are banned from the voice channel: {final_channel.name}")
                 except discord.HTTPException:
                     pass
                 return
 
-            await self.update_vc_embed(final_channel)
+            self.roster_for(final_channel).add(member)
+            self.update_vc_embed(final_channel)
 
-    async def is_user_banned(self, member, channel):
+    def is_user_banned(self, member, channel):
         if channel is None:
             return False
-        block_info = await self.vc_blocks.find_one({"voice_channel_id": channel.id})
-        return block_info and member.id in block_info.get("banned_user_ids", [])
+        return self.ban_index.is_banned(channel.id, member.id)
 
-    async def update_vc_embed(self, channel: discord.VoiceChannel):
+    def roster_for(self, channel: discord.VoiceChannel) -> ChannelRoster:
+        roster = self.rosters.get(channel.id)
+        if roster is None:
+            roster = self.rosters[channel.id] = ChannelRoster(channel)
+        roster.title = channel.name
+        return roster
 
+    def update_vc_embed(self, channel: discord.VoiceChannel):
+        """Schedule a render of the channel's member embed if what it shows has changed."""
         guild_afk = channel.guild.afk_channel
-        exclude_channel_ids = {guild_afk.id} if guild_afk else  set()
-
-        # exclude_channel_ids.update({})
+        if guild_afk and channel.id == guild_afk.id:
+            return
 
-        if channel.id in exclude_channel_ids:
+        if channel.members and not self.roster_for(channel).changed():
             return
 
-        if channel.id in self._creating_embed_for_channel:
+        self.embed_renderer.mark_dirty(channel)
+
+    async def render_vc_embed(self, channel: discord.VoiceChannel):
+        if not channel.members:
+            await self.cleanup_vc_embed(channel)
             return
 
-        self._creating_embed_for_channel.add(channel.id)
-        try:
-            if not channel.members:
-                await self.cleanup_vc_embed(channel)
-                return
+        roster = self.roster_for(channel)
+        snapshot = roster.snapshot()
+        if snapshot == roster.rendered:
+            return
 
-            embed = discord.Embed(title=f"Members in {channel.name}", color=discord.Color.blue())
-            view = discord.ui.View(timeout=None)
-
-            for member in channel.members:
-                if not member.bot and member.id != channel.guild.owner_id:
-                    embed.add_field(name=member.display_name, value="\u200b", inline=False)
-                    kick_button = discord.ui.Button(
-                        label=f"Kick {member.display_name}",
-                        style=discord.ButtonStyle.red,
-                        custom_id=f"kick_{member.id}"
-                    )
-                    kick_button.callback = self.kick_button_callback
-                    view.add_item(kick_button)
-
-            embed_info = await self.vc_embeds.find_one({"voice_channel_id": channel.id})
-            if embed_info and embed_info.get("message_id"):
-                try:
-                    message = await channel.fetch_message(embed_info["message_id"])
-                    await message.edit(embed=embed, view=view)
-                except discord.NotFound:
-                    message = await channel.send(embed=embed, view=view)
-                    await self.vc_embeds.update_one({"voice_channel_id": channel.id},
-                                                    {"$set": {"message_id": message.id}}, upsert=True)
-            else:
-                message = await channel.send(embed=embed, view=view)
-                await self.vc_embeds.update_one({"voice_channel_id": channel.id}, {"$set": {"message_id": message.id}},
-                                                upsert=True)
-        finally:
-            self._creating_embed_for_channel.discard(channel.id)
+        async def persist_message_id(message_id: int):
+            self.embed_message_ids[channel.id] = message_id
+            await self.embeds.save(channel.guild.id, channel.id, message_id)
+
+        await self.bot.displays.publish(
+            channel,
+            channel.guild.id,
+            f"vc_embed:{channel.id}",
+            self.embed_message_ids.get(channel.id),
+            persist_message_id,
+            **self.build_vc_embed(roster)
+        )
+        roster.rendered = snapshot
+
+    def build_vc_embed(self, roster: ChannelRoster) -> dict:
+        """Embed and view for the roster's current page."""
+        members = list(roster.members.items())
+        roster.page, entries = page_slice(members, roster.page)
+
+        embed = discord.Embed(title=f"Members in {roster.title}", color=discord.Color.blue())
+        lines = []
+        options = []
+        for i, (member_id, display_name) in enumerate(entries, start=roster.page * PAGE_SIZE + 1):
+            lines.append(f"{i}. {display_name}")
+            options.append(discord.SelectOption(label=f"Kick {display_name}", value=str(member_id)))
+        embed.description = "\n".join(lines) or "\u200b"
+        embed.set_footer(text=f"{len(members)} members")
+
+        view = VCRosterView(roster.page, page_count(len(members)), options)
+        return {"embed": embed, "view": view}
+
+    async def turn_roster_page(self, interaction: discord.Interaction, delta: int):
+        channel = interaction.channel
+        if not isinstance(channel, (discord.VoiceChannel, discord.StageChannel)) or not channel.members:
+            await interaction.response.send_message("This channel is empty.", ephemeral=True)
+            return
+        roster = self.roster_for(channel)
+        roster.page += delta
+        await interaction.response.edit_message(**self.build_vc_embed(roster))
 
     async def cleanup_vc_embed(self, channel):
-        embed_info = await self.vc_embeds.find_one_and_delete({"voice_channel_id": channel.id})
-        if embed_info and embed_info.get("message_id"):
-            try:
-                message = await channel.fetch_message(embed_info["message_id"])
-                await message.delete()
-            except discord.NotFound:
-                pass
+        self.rosters.pop(channel.id, None)
+        message_id = self.embed_message_ids.pop(channel.id, None)
+        if message_id is None:
+            return
+
+        await self.embeds.delete(channel.id)
+        await self.bot.displays.delete(
+            channel,
+            channel.guild.id,
+            f"vc_embed:{channel.id}",
+            message_id
+        )
 
-    async def kick_button_callback(self, interaction: discord.Interaction):
-        target_user_id = int(interaction.data["custom_id"].split("_")[1])
+    async def start_kick_vote(self, interaction: discord.Interaction, target_user_id: int):
         target_user = interaction.guild.get_member(target_user_id)
 
         if not target_user or not target_user.voice or not target_user.voice.channel:
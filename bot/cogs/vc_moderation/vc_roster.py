@@ -0,0 +1,35 @@
+from typing import Dict, Optional, Tuple
+
+import discord
+
+
+class ChannelRoster:
+    """
+    The members listed in one voice channel's member embed.
+
+    Voice events apply add/remove deltas. `changed` compares the visible roster
+    with the one last rendered, so joins and leaves that don't change what the
+    embed shows (bots, the owner, duplicate events) cost no edit.
+    """
+
+    def __init__(self, channel: discord.VoiceChannel):
+        self.title = channel.name
+        self.owner_id = channel.guild.owner_id
+        self.members: Dict[int, str] = {}
+        self.rendered: Optional[Tuple] = None
+        self.page = 0
+        for member in channel.members:
+            self.add(member)
+
+    def add(self, member: discord.Member):
+        if not member.bot and member.id != self.owner_id:
+            self.members[member.id] = member.display_name
+
+    def remove(self, member_id: int):
+        self.members.pop(member_id, None)
+
+    def snapshot(self) -> Tuple:
+        return self.title, tuple(self.members.items())
+
+    def changed(self) -> bool:
+        return self.snapshot() != self.rendered
@@ -0,0 +1,115 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+import discord
+from discord.ext import commands
+
+
+class VoiceRouter(commands.Cog):
+    """
+    The only `on_voice_state_update` listener in the bot.
+
+    Cogs register themselves as handlers and expose two coroutines:
+    `voice_channel_ids(guild)`, the channels they care about, and
+    `handle_voice_update(member, before, after)`. Events are dispatched only to
+    the handlers indexed under `before.channel` or `after.channel`, so voice
+    activity in channels nobody configured costs a dict lookup.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.handlers = []
+        self._index: Dict[Tuple[int, int], List] = {}
+        self._indexed_guilds: Dict[int, Set[Tuple[int, int]]] = {}
+        # Per-shard counters for the stats command
+        self.started = time.monotonic()
+        self.events = Counter()
+        self.in_flight = Counter()
+        self.bot.config_cache.add_listener(self._on_config_change)
+
+    def register(self, handler):
+        if handler not in self.handlers:
+            self.handlers.append(handler)
+        self.invalidate()
+
+    def unregister(self, handler):
+        if handler in self.handlers:
+            self.handlers.remove(handler)
+        self.invalidate()
+
+    def invalidate(self, guild_id: int = None):
+        """Drop the channel index for one guild, or for every guild."""
+        guild_ids = [guild_id] if guild_id is not None else list(self._indexed_guilds)
+        for gid in guild_ids:
+            for key in self._indexed_guilds.pop(gid, ()):
+                self._index.pop(key, None)
+
+    def _on_config_change(self, name: str, guild_id: int):
+        self.invalidate(guild_id)
+
+    async def _build_index(self, guild: discord.Guild):
+        keys = set()
+        for handler in list(self.handlers):
+            for channel_id in await handler.voice_channel_ids(guild):
+                key = (guild.id, channel_id)
+                handlers = self._index.setdefault(key, [])
+                if handler not in handlers:
+                    handlers.append(handler)
+                keys.add(key)
+        self._indexed_guilds[guild.id] = keys
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        guild = member.guild
+        self.events[guild.shard_id] += 1
+
+        # Mute, deafen and stream toggles never change channel membership
+        if before.channel == after.channel:
+            return
+
+        if guild.id not in self._indexed_guilds:
+            await self._build_index(guild)
+
+        handlers = []
+        for channel in (before.channel, after.channel):
+            if channel is None:
+                continue
+            for handler in self._index.get((guild.id, channel.id), ()):
+                if handler not in handlers:
+                    handlers.append(handler)
+
+        if not handlers:
+            return
+
+        self.in_flight[guild.shard_id] += 1
+        try:
+            results = await asyncio.gather(
+                *(handler.handle_voice_update(member, before, after) for handler in handlers),
+                return_exceptions=True
+            )
+        finally:
+            self.in_flight[guild.shard_id] -= 1
+        for handler, result in zip(handlers, results):
+            if isinstance(result, Exception):
+                print(f"Error in {type(handler).__name__} voice handler for guild {guild.id}: {result!r}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+            self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+            self.invalidate(channel.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        if before.afk_channel != after.afk_channel:
+            self.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invalidate(guild.id)
@@ -1,42 +1,341 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
 import discord
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from discord.ext import commands
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 from dotenv import load_dotenv
 
+from bot.cogs.voice_router import VoiceRouter
+from bot.storage import close_database, open_database
+from bot.utils.action_scheduler import ActionScheduler
+from bot.utils.display_registry import DisplayRegistry
+from bot.utils.guild_actor import GuildActor
+from bot.utils.intents_profile import cache_footprint, startup_profile
+from bot.utils.log_sink import LogSink
+from bot.utils.queue_store import QueueField, QueueStore
+
 load_dotenv()
 
+# Storage backend: "mongo" (MONGO_URI), "sqlite" (SQLITE_PATH) or "memory"
+storage_backend = os.getenv("STORAGE_BACKEND", "mongo")
 mongo_uri = os.getenv("MONGO_URI")
+sqlite_path = os.getenv("SQLITE_PATH", "queuebot.db")
+
+# Minimum seconds between two edits of the same queue display
+queue_render_window = float(os.getenv("QUEUE_RENDER_WINDOW", "2"))
+
+# Seconds log lines are buffered before being sent as one message
+log_flush_interval = float(os.getenv("LOG_FLUSH_INTERVAL", "5"))
 
-mongo_client = AsyncIOMotorClient(mongo_uri)
+# Queue changes are journaled to this file and written to MongoDB every QUEUE_FLUSH_INTERVAL seconds
+queue_journal_path = os.getenv("QUEUE_JOURNAL_PATH", "queue_journal.jsonl")
+queue_flush_interval = float(os.getenv("QUEUE_FLUSH_INTERVAL", "2"))
+
+# Run one gateway connection per shard (AutoShardedBot)
+bot_sharded = os.getenv("BOT_SHARDED", "").lower() in ("1", "true", "yes")
+
+# Seconds an empty temporary channel is kept before it is deleted
+temp_channel_grace_seconds = float(os.getenv("TEMP_CHANNEL_GRACE_SECONDS", "30"))
 
 extensions = [
     "bot.cogs.twitch_ward_queue",
     "bot.cogs.main_event_queue",
     "bot.cogs.temp_channels",
     "bot.cogs.help_commands",
+    "bot.cogs.stats_commands",
+    "bot.cogs.queue_position",
     "bot.cogs.vc_moderation"
 ]
 
 
-class Bot(commands.Bot):
-    def __init__(self, command_prefix: str, intent: discord.Intents, **kwargs):
-        super().__init__(command_prefix=command_prefix, intents=intent, **kwargs)
-        self.mongo_client = mongo_client
-        self.db = self.mongo_client["QueueBot"]
+def as_id(value) -> Optional[int]:
+    """Normalise a stored snowflake (int, str or extended JSON) to an int."""
+    if isinstance(value, dict):
+        value = value.get("$numberLong", 0)
+    return int(value) if value else None
+
+
+@dataclass
+class MainEventConfig:
+    live_event_channel_id: Optional[int] = None
+    queue_channels_ids: List[int] = field(default_factory=list)
+    queue_display_channel_id: Optional[int] = None
+    log_channel_id: Optional[int] = None
+    queue_message_id: Optional[int] = None
+
+    @classmethod
+    def from_doc(cls, doc: dict):
+        return cls(
+            live_event_channel_id=as_id(doc.get("live_event_channel_id")),
+            queue_channels_ids=[as_id(cid) for cid in doc.get("queue_channels_ids", []) if as_id(cid)],
+            queue_display_channel_id=as_id(doc.get("queue_display_channel_id")),
+            log_channel_id=as_id(doc.get("log_channel_id")),
+            queue_message_id=as_id(doc.get("queue_message_id")),
+        )
+
+
+@dataclass
+class TwitchWardConfig:
+    waiting_channel_id: Optional[int] = None
+    live_channel_id: Optional[int] = None
+    queue_log_channel: Optional[int] = None
+    queue_text_channel_id: Optional[int] = None
+    queue_embed_message_id: Optional[int] = None
+    max_guests: int = 3
+    auto_fill_enabled: bool = False
+    priority_tiers: Dict[int, int] = field(default_factory=dict)  # role id -> queue tier, higher served first
+
+    @classmethod
+    def from_doc(cls, doc: dict):
+        return cls(
+            waiting_channel_id=as_id(doc.get("waiting_channel_id")),
+            live_channel_id=as_id(doc.get("live_channel_id")),
+            queue_log_channel=as_id(doc.get("queue_log_channel")),
+            queue_text_channel_id=as_id(doc.get("queue_text_channel_id")),
+            queue_embed_message_id=as_id(doc.get("queue_embed_message_id")),
+            max_guests=doc.get("max_guests", 3),
+            auto_fill_enabled=bool(doc.get("auto_fill_enabled", False)),
+            priority_tiers={as_id(role_id): int(tier) for role_id, tier in doc.get("priority_tiers", {}).items() if as_id(role_id)}
+        )
+
+
+@dataclass
+class TempChannelConfig:
+    channel_ids: Set[int] = field(default_factory=set)
+    pool_sizes: Dict[int, int] = field(default_factory=dict)  # hub channel id -> spare channels to keep
+
+    @classmethod
+    def from_doc(cls, doc: dict):
+        return cls(
+            channel_ids={as_id(cid) for cid in doc.get("channel_ids", []) if as_id(cid)},
+            pool_sizes={as_id(hub_id): int(size) for hub_id, size in doc.get("pool_sizes", {}).items() if as_id(hub_id)}
+        )
+
+
+@dataclass
+class ModerationConfig:
+    mod_log_channel_id: Optional[int] = None
+
+    @classmethod
+    def from_doc(cls, doc: dict):
+        return cls(mod_log_channel_id=as_id(doc.get("mod_log_channel_id")))
+
+
+# Queues kept in the QueueStore; they live in the same documents as the config sections
+# of the same name, but are read and written only through the store
+queue_fields = {
+    "main_event": QueueField("main_config_collection", "_id", "current_queue"),
+    "twitch_ward": QueueField("twitch_ward_config_collection", "_id", "twitch_ward_queue"),
+}
+
+
+@dataclass(frozen=True)
+class ConfigSection:
+    collection: str
+    key: str
+    model: type
+
+
+class GuildConfigCache:
+    """
+    Write-through, in-memory cache of every guild's configuration documents.
+
+    All sections are loaded in bulk at startup, so a guild without an entry is
+    simply not configured and voice events never need to touch the database.
+    Admin commands write through `update`, which stores the document returned
+    by MongoDB in place of the cached copy.
+    """
+
+    sections = {
+        "main_event": ConfigSection("main_config_collection", "_id", MainEventConfig),
+        "twitch_ward": ConfigSection("twitch_ward_config_collection", "_id", TwitchWardConfig),
+        "temp_channels": ConfigSection("temp_collection", "_id", TempChannelConfig),
+        "moderation": ConfigSection("guild_config", "guild_id", ModerationConfig),
+    }
+
+    def __init__(self, db):
+        self.db = db
+        self._configs: Dict[str, Dict[int, object]] = {name: {} for name in self.sections}
+        self._stale: Set[Tuple[str, int]] = set()
+        self._listeners: List[Callable[[str, int], None]] = []
+
+    def add_listener(self, callback: Callable[[str, int], None]):
+        """Register `callback(section, guild_id)` to be called whenever a cached entry changes."""
+        self._listeners.append(callback)
+
+    def _notify(self, name: str, guild_id: int):
+        for callback in self._listeners:
+            callback(name, guild_id)
+
+    async def load(self):
+        await asyncio.gather(*(self._load_section(name) for name in self.sections))
+
+    async def _load_section(self, name: str):
+        section = self.sections[name]
+        configs = {}
+        async for doc in self.db[section.collection].find({}):
+            guild_id = as_id(doc.get(section.key))
+            if guild_id:
+                configs[guild_id] = section.model.from_doc(doc)
+        self._configs[name] = configs
+        self._stale = {entry for entry in self._stale if entry[0] != name}
+        for guild_id in configs:
+            self._notify(name, guild_id)
+        print(f"Loaded {len(configs)} {name} configs")
+
+    async def get(self, name: str, guild_id: int):
+        """Return the cached config, only hitting the database for stale entries."""
+        if (name, guild_id) in self._stale:
+            return await self.refresh(name, guild_id)
+        return self._configs[name].get(guild_id)
+
+    async def refresh(self, name: str, guild_id: int):
+        section = self.sections[name]
+        doc = await self.db[section.collection].find_one({section.key: guild_id})
+        return self._store(name, guild_id, doc)
+
+    async def update(self, name: str, guild_id: int, update: dict, upsert: bool = True, query: dict = None):
+        """
+        Apply a MongoDB update to a guild's config and cache the resulting document.
+
+        Returns the new config, or None when `query` did not match (and nothing was upserted).
+        """
+        section = self.sections[name]
+        doc = await self.db[section.collection].find_one_and_update(
+            {section.key: guild_id, **(query or {})},
+            update,
+            upsert=upsert,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return None
+        return self._store(name, guild_id, doc)
+
+    def invalidate(self, name: str, guild_id: int):
+        """Mark an entry stale so the next `get` reloads it from the database."""
+        self._configs[name].pop(guild_id, None)
+        self._stale.add((name, guild_id))
+        self._notify(name, guild_id)
+
+    def drop_guild(self, guild_id: int):
+        for name, configs in self._configs.items():
+            configs.pop(guild_id, None)
+            self._stale.discard((name, guild_id))
+            self._notify(name, guild_id)
+
+    def _store(self, name: str, guild_id: int, doc: Optional[dict]):
+        self._stale.discard((name, guild_id))
+        if doc is None:
+            self._configs[name].pop(guild_id, None)
+            config = None
+        else:
+            config = self.sections[name].model.from_doc(doc)
+            self._configs[name][guild_id] = config
+        self._notify(name, guild_id)
+        return config
+
+
+class BotMixin:
+    """
+    QueueBot's shared state and startup, for both the single-connection and the
+    sharded client. All state is keyed by guild or channel id and the shards of
+    an AutoShardedBot run in one process, so queues, votes and temp channels
+    need nothing shard-specific.
+    """
+
+    def __init__(self, command_prefix: str, intent: discord.Intents = None, **kwargs):
+        options = startup_profile(extensions)
+        if intent is not None:
+            options["intents"] = intent
+        options.update(kwargs)
+        super().__init__(command_prefix=command_prefix, **options)
+        self.db = open_database(storage_backend, mongo_uri=mongo_uri, sqlite_path=sqlite_path)
         self.scheduler = AsyncIOScheduler()
+        self.config_cache = GuildConfigCache(self.db)
+        self.voice_router = VoiceRouter(self)
+        self.actions = ActionScheduler()
+        self.displays = DisplayRegistry(self.actions)
+        self.log_sink = LogSink(self.actions, interval=log_flush_interval)
+        self.queue_actor = GuildActor()
+        self.queues = QueueStore(self.db, queue_fields, queue_journal_path, interval=queue_flush_interval)
 
-    async def on_ready(self):
-        for extension in extensions:
-            try:
-                await self.load_extension(extension)
-            except Exception as e:
-                print(f"Failed to load extension: {e}")
+    async def setup_hook(self):
+        """One-time startup, run before connecting to the gateway (not again on reconnects)."""
+        started = time.perf_counter()
+        await asyncio.gather(self.config_cache.load(), self.queues.load())
+        await self.add_cog(self.voice_router)
+        config_done = time.perf_counter()
+
+        await asyncio.gather(*(self.load_timed(extension) for extension in extensions))
+        extensions_done = time.perf_counter()
+
+        await self.sync_commands()
+        sync_done = time.perf_counter()
+
+        self.scheduler.start()
+        print(
+            f"Startup: config {config_done - started:.2f}s, "
+            f"extensions {extensions_done - config_done:.2f}s, "
+            f"command sync {sync_done - extensions_done:.2f}s"
+        )
+
+    async def load_timed(self, extension: str):
+        started = time.perf_counter()
+        try:
+            await self.load_extension(extension)
+            print(f"Loaded {extension} in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"Failed to load extension {extension}: {e}")
+
+    async def sync_commands(self):
+        """Sync the global command tree, but only when its definitions changed since the last sync."""
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        digest = hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+        key = {"_id": f"command_tree:{self.application_id}"}
+
+        meta = await self.db.bot_meta.find_one(key)
+        if meta and meta.get("hash") == digest:
+            print("Command tree unchanged, skipping sync")
+            return
 
         synced = await self.tree.sync()
+        await self.db.bot_meta.update_one(key, {"$set": {"hash": digest}}, upsert=True)
         print(f"Synced {len(synced)} commands")
 
-        print("Bot is ready....")
+    async def on_ready(self):
+        print(f"Bot is ready.... ({cache_footprint(self)})")
 
-        self.scheduler.start()
+    async def close(self):
+        # Finish queue commands before the final queue flush, then send what
+        # is still queued while the connection is up; the log sink's final
+        # flush goes out through the drained scheduler
+        await self.queue_actor.close()
+        await self.actions.close()
+        await self.log_sink.close()
+        await self.queues.close()
+        await super().close()
+        close_database(self.db)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.config_cache.drop_guild(guild.id)
+
+    def shard_latencies(self) -> List[Tuple[int, float]]:
+        return [(0, self.latency)]
+
+
+class Bot(BotMixin, commands.Bot):
+    pass
+
+
+class ShardedBot(BotMixin, commands.AutoShardedBot):
+    """Opt-in with BOT_SHARDED=1: one gateway connection per shard, so a busy guild only delays its own shard."""
+
+    def shard_latencies(self) -> List[Tuple[int, float]]:
+        return self.latencies
@@ -0,0 +1,25 @@
+from bot.storage.base import DocumentDatabase
+
+
+def open_database(backend: str, mongo_uri: str = None, sqlite_path: str = None, name: str = "QueueBot"):
+    """
+    The bot's database for a storage backend: `mongo` (Motor), `sqlite` or
+    `memory`. All three expose the same collection API, so the cogs and the
+    repositories don't depend on which one is used.
+    """
+    if backend == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(mongo_uri)[name]
+    if backend == "sqlite":
+        from bot.storage.sqlite import SQLiteDatabase
+        return SQLiteDatabase(sqlite_path)
+    if backend == "memory":
+        from bot.storage.memory import MemoryDatabase
+        return MemoryDatabase()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def close_database(db):
+    # A Motor database would hand back a collection named "close", so only close our own backends
+    if isinstance(db, DocumentDatabase):
+        db.close()
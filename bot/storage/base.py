@@ -0,0 +1,448 @@
+import abc
+import asyncio
+import copy
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne
+
+_MISSING = object()
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int = 0, modified_count: int = 0, upserted_id=None):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+        self.upserted_id = upserted_id
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int = 0):
+        self.deleted_count = deleted_count
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class BulkWriteResult:
+    def __init__(self):
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+        self.inserted_count = 0
+        self.upserted_count = 0
+
+
+class Cursor:
+    """
+    The part of Motor's cursor the bot uses: async iteration, `batch_size` and
+    `to_list`. Documents are read from storage one batch at a time.
+    """
+
+    def __init__(self, collection: "DocumentCollection", query: dict, projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._batch_size = DocumentCollection.SCAN_PAGE
+
+    def batch_size(self, size: int) -> "Cursor":
+        self._batch_size = max(size, 1)
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        docs = []
+        async for doc in self:
+            if length is not None and len(docs) >= length:
+                break
+            docs.append(doc)
+        return docs
+
+    async def __aiter__(self):
+        async for doc in self._collection._iter_matching(self._query, self._batch_size):
+            yield project(doc, self._projection)
+
+
+class DocumentCollection(abc.ABC):
+    """
+    The subset of Motor's collection API the bot uses, on top of four storage
+    primitives: `_get`, `_put`, `_delete` and `_scan`.
+
+    Filters support equality (matching array elements, like MongoDB), dotted
+    paths and `$in`, `$nin`, `$ne`, `$exists`, `$gt`, `$gte`, `$lt`, `$lte`.
+    Updates support `$set`, `$setOnInsert`, `$unset`, `$inc`, `$push`,
+    `$addToSet`, `$pull` and `$pop`. Writes are serialised per collection, so
+    each single-document operation is atomic like it is in MongoDB.
+    """
+
+    # Candidates fetched per `_scan` call when no batch size is given
+    SCAN_PAGE = 500
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = asyncio.Lock()
+
+    # Storage primitives
+
+    @abc.abstractmethod
+    async def _get(self, doc_id) -> Optional[dict]:
+        """The document with this `_id`, or None."""
+
+    @abc.abstractmethod
+    async def _put(self, doc: dict):
+        """Insert or replace a document by `_id`, keeping its scan position."""
+
+    @abc.abstractmethod
+    async def _delete(self, doc_id):
+        """Delete a document by `_id`; missing documents are ignored."""
+
+    @abc.abstractmethod
+    async def _scan(self, query: dict, after, limit: int) -> List[Tuple[Any, dict]]:
+        """
+        Up to `limit` candidate documents for `query` as (position, document)
+        pairs in a stable order, starting after position `after` (None for
+        the start). Backends may narrow candidates by the filter but must not
+        drop any match; every candidate is checked with `matches`. A page
+        shorter than `limit` ends the scan.
+        """
+
+    # Queries
+
+    async def _iter_matching(self, query: dict, page_size: int = SCAN_PAGE):
+        doc_id = query.get("_id", _MISSING)
+        if doc_id is not _MISSING and not _is_operator(doc_id):
+            doc = await self._get(doc_id)
+            if doc is not None and matches(doc, query):
+                yield doc
+            return
+
+        after = None
+        while True:
+            page = await self._scan(query, after, page_size)
+            for _, doc in page:
+                if matches(doc, query):
+                    yield doc
+            if len(page) < page_size:
+                return
+            after = page[-1][0]
+
+    async def _matching(self, query: dict, limit: Optional[int] = None) -> List[dict]:
+        found = []
+        async for doc in self._iter_matching(query):
+            found.append(doc)
+            if limit is not None and len(found) >= limit:
+                break
+        return found
+
+    def find(self, query: dict = None, projection: dict = None) -> Cursor:
+        return Cursor(self, query or {}, projection)
+
+    async def find_one(self, query: dict = None, projection: dict = None) -> Optional[dict]:
+        docs = await self._matching(query or {}, limit=1)
+        return project(docs[0], projection) if docs else None
+
+    async def count_documents(self, query: dict) -> int:
+        return len(await self._matching(query))
+
+    # Writes
+
+    async def insert_one(self, doc: dict) -> InsertOneResult:
+        async with self._lock:
+            doc = copy.deepcopy(doc)
+            doc.setdefault("_id", uuid.uuid4().hex)
+            if await self._get(doc["_id"]) is not None:
+                raise ValueError(f"Duplicate _id in {self.name}: {doc['_id']!r}")
+            await self._put(doc)
+            return InsertOneResult(doc["_id"])
+
+    async def _update(self, query: dict, update: dict, upsert: bool, many: bool):
+        """Apply an update; returns (result, [(before, after), ...])."""
+        docs = await self._matching(query, limit=None if many else 1)
+        result = UpdateResult(matched_count=len(docs))
+        changes = []
+        for doc in docs:
+            before = copy.deepcopy(doc)
+            apply_update(doc, update)
+            if doc != before:
+                await self._put(doc)
+                result.modified_count += 1
+            changes.append((before, doc))
+
+        if not docs and upsert:
+            doc = upsert_base(query)
+            apply_update(doc, update, inserting=True)
+            doc.setdefault("_id", uuid.uuid4().hex)
+            await self._put(doc)
+            result.upserted_id = doc["_id"]
+            changes.append((None, doc))
+        return result, changes
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        async with self._lock:
+            result, _ = await self._update(query, update, upsert, many=False)
+            return result
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        async with self._lock:
+            result, _ = await self._update(query, update, upsert, many=True)
+            return result
+
+    async def find_one_and_update(self, query: dict, update: dict, upsert: bool = False,
+                                  return_document: bool = False, projection: dict = None) -> Optional[dict]:
+        async with self._lock:
+            _, changes = await self._update(query, update, upsert, many=False)
+        if not changes:
+            return None
+        before, after = changes[0]
+        doc = after if return_document else before
+        return project(doc, projection) if doc is not None else None
+
+    async def _remove(self, query: dict, many: bool) -> List[dict]:
+        docs = await self._matching(query, limit=None if many else 1)
+        for doc in docs:
+            await self._delete(doc["_id"])
+        return docs
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        async with self._lock:
+            return DeleteResult(len(await self._remove(query, many=False)))
+
+    async def delete_many(self, query: dict) -> DeleteResult:
+        async with self._lock:
+            return DeleteResult(len(await self._remove(query, many=True)))
+
+    async def find_one_and_delete(self, query: dict, projection: dict = None) -> Optional[dict]:
+        async with self._lock:
+            docs = await self._remove(query, many=False)
+        return project(docs[0], projection) if docs else None
+
+    async def bulk_write(self, requests: Iterable, ordered: bool = True) -> BulkWriteResult:
+        result = BulkWriteResult()
+        for request in requests:
+            if isinstance(request, (UpdateOne, UpdateMany)):
+                update = (self.update_one if isinstance(request, UpdateOne) else self.update_many)
+                outcome = await update(request._filter, request._doc, upsert=bool(request._upsert))
+                result.matched_count += outcome.matched_count
+                result.modified_count += outcome.modified_count
+                result.upserted_count += outcome.upserted_id is not None
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                delete = self.delete_one if isinstance(request, DeleteOne) else self.delete_many
+                result.deleted_count += (await delete(request._filter)).deleted_count
+            elif isinstance(request, InsertOne):
+                await self.insert_one(request._doc)
+                result.inserted_count += 1
+            else:
+                raise NotImplementedError(f"Unsupported bulk operation: {type(request).__name__}")
+        return result
+
+
+class DocumentDatabase(abc.ABC):
+    """Collections by attribute or item access, like a Motor database."""
+
+    def __init__(self):
+        self._collections: Dict[str, DocumentCollection] = {}
+
+    @abc.abstractmethod
+    def _create_collection(self, name: str) -> DocumentCollection:
+        """A new collection object; called once per name."""
+
+    def __getitem__(self, name: str) -> DocumentCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = self._create_collection(name)
+        return collection
+
+    def __getattr__(self, name: str) -> DocumentCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def close(self):
+        pass
+
+
+# Query matching
+
+def _is_operator(value) -> bool:
+    return isinstance(value, dict) and any(key.startswith("$") for key in value)
+
+
+def _resolve(value, parts: List[str]) -> List[Any]:
+    """Values at a dotted path, descending into arrays like MongoDB does."""
+    if not parts:
+        return [value]
+    head, rest = parts[0], parts[1:]
+    if isinstance(value, dict):
+        return _resolve(value[head], rest) if head in value else []
+    if isinstance(value, list):
+        if head.isdigit():
+            index = int(head)
+            return _resolve(value[index], rest) if index < len(value) else []
+        found = []
+        for element in value:
+            if isinstance(element, dict):
+                found.extend(_resolve(element, parts))
+        return found
+    return []
+
+
+def _candidates(values: List[Any]) -> List[Any]:
+    expanded = []
+    for value in values:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _compare(op: str, arg, values: List[Any]) -> bool:
+    candidates = _candidates(values)
+    if op == "$exists":
+        return bool(values) == bool(arg)
+    if op == "$ne":
+        return not _compare_eq(arg, values)
+    if op == "$in":
+        return any(_compare_eq(item, values) for item in arg)
+    if op == "$nin":
+        return not any(_compare_eq(item, values) for item in arg)
+    comparisons = {
+        "$gt": lambda a, b: a > b,
+        "$gte": lambda a, b: a >= b,
+        "$lt": lambda a, b: a < b,
+        "$lte": lambda a, b: a <= b,
+    }
+    if op in comparisons:
+        compare = comparisons[op]
+        for candidate in candidates:
+            try:
+                if candidate is not None and compare(candidate, arg):
+                    return True
+            except TypeError:
+                continue
+        return False
+    raise NotImplementedError(f"Unsupported query operator: {op}")
+
+
+def _compare_eq(expected, values: List[Any]) -> bool:
+    if expected is None and not values:
+        return True
+    return any(candidate == expected for candidate in _candidates(values))
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for path, condition in query.items():
+        values = _resolve(doc, path.split("."))
+        if _is_operator(condition):
+            if not all(_compare(op, arg, values) for op, arg in condition.items()):
+                return False
+        elif not _compare_eq(condition, values):
+            return False
+    return True
+
+
+def project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return doc
+    included = {path.split(".")[0] for path, flag in projection.items() if flag and path != "_id"}
+    if not included:
+        return {key: value for key, value in doc.items() if projection.get(key, 1)}
+    projected = {key: doc[key] for key in included if key in doc}
+    if projection.get("_id", 1) and "_id" in doc:
+        projected["_id"] = doc["_id"]
+    return projected
+
+
+# Updates
+
+def _container(doc: dict, path: str, create: bool):
+    """Parent container and final key for a dotted path."""
+    parts = path.split(".")
+    node = doc
+    for part in parts[:-1]:
+        if isinstance(node, list):
+            node = node[int(part)]
+            continue
+        if part not in node or not isinstance(node[part], (dict, list)):
+            if not create:
+                return None, None
+            node[part] = {}
+        node = node[part]
+    return node, parts[-1]
+
+
+def _get_path(doc: dict, path: str, default=None):
+    node, key = _container(doc, path, create=False)
+    if node is None:
+        return default
+    if isinstance(node, list):
+        index = int(key)
+        return node[index] if index < len(node) else default
+    return node.get(key, default)
+
+
+def _set_path(doc: dict, path: str, value):
+    node, key = _container(doc, path, create=True)
+    if isinstance(node, list):
+        node[int(key)] = value
+    else:
+        node[key] = value
+
+
+def _unset_path(doc: dict, path: str):
+    node, key = _container(doc, path, create=False)
+    if isinstance(node, dict):
+        node.pop(key, None)
+
+
+def _pull_matches(element, condition) -> bool:
+    if _is_operator(condition):
+        return all(_compare(op, arg, [element]) for op, arg in condition.items())
+    if isinstance(condition, dict) and isinstance(element, dict):
+        return matches(element, condition)
+    return element == condition
+
+
+def _each(arg) -> List[Any]:
+    if isinstance(arg, dict) and "$each" in arg:
+        return [copy.deepcopy(value) for value in arg["$each"]]
+    return [copy.deepcopy(arg)]
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False):
+    for op, fields in update.items():
+        for path, arg in fields.items():
+            if op == "$set":
+                _set_path(doc, path, copy.deepcopy(arg))
+            elif op == "$setOnInsert":
+                if inserting:
+                    _set_path(doc, path, copy.deepcopy(arg))
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                _set_path(doc, path, _get_path(doc, path, 0) + arg)
+            elif op in ("$push", "$addToSet"):
+                array = list(_get_path(doc, path, []))
+                for value in _each(arg):
+                    if op == "$push" or value not in array:
+                        array.append(value)
+                _set_path(doc, path, array)
+            elif op == "$pull":
+                array = _get_path(doc, path)
+                if isinstance(array, list):
+                    _set_path(doc, path, [element for element in array if not _pull_matches(element, arg)])
+            elif op == "$pop":
+                array = _get_path(doc, path)
+                if isinstance(array, list) and array:
+                    _set_path(doc, path, array[1:] if arg == -1 else array[:-1])
+            else:
+                raise NotImplementedError(f"Unsupported update operator: {op}")
+
+
+def upsert_base(query: dict) -> dict:
+    """The document an upsert starts from: the query's equality conditions."""
+    doc = {}
+    for path, condition in query.items():
+        if not path.startswith("$") and not _is_operator(condition):
+            _set_path(doc, path, copy.deepcopy(condition))
+    return doc
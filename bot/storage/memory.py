@@ -0,0 +1,39 @@
+import copy
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from bot.storage.base import DocumentCollection, DocumentDatabase
+
+
+class MemoryCollection(DocumentCollection):
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._docs: Dict = {}
+        self._positions: Dict = {}  # _id -> insertion number, stable across replaces
+        self._counter = itertools.count(1)
+
+    async def _get(self, doc_id) -> Optional[dict]:
+        doc = self._docs.get(doc_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def _put(self, doc: dict):
+        if doc["_id"] not in self._positions:
+            self._positions[doc["_id"]] = next(self._counter)
+        self._docs[doc["_id"]] = copy.deepcopy(doc)
+
+    async def _delete(self, doc_id):
+        self._docs.pop(doc_id, None)
+        self._positions.pop(doc_id, None)
+
+    async def _scan(self, query: dict, after, limit: int) -> List[Tuple[Any, dict]]:
+        # Dict order is insertion order, which is also position order
+        page = ((self._positions[doc_id], doc) for doc_id, doc in self._docs.items()
+                if after is None or self._positions[doc_id] > after)
+        return [(position, copy.deepcopy(doc)) for position, doc in itertools.islice(page, limit)]
+
+
+class MemoryDatabase(DocumentDatabase):
+    """Process-local storage: nothing survives a restart. Meant for tests and load runs."""
+
+    def _create_collection(self, name: str) -> MemoryCollection:
+        return MemoryCollection(name)
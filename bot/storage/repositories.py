@@ -0,0 +1,71 @@
+from typing import Dict, List
+
+import discord
+from pymongo import ReturnDocument
+
+# Queue, config and ban data have their own repositories with in-memory
+# state: QueueStore, GuildConfigCache and BanIndex. These two cover what the
+# moderation cogs used to read and write on raw collections.
+
+
+class KickCountRepository:
+    """Per-user VC kick counts and the roles saved while a user is quarantined (`users` collection)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def record_kick(self, user_id: int) -> int:
+        """Count a kick and return the user's new kick count."""
+        doc = await self.collection.find_one_and_update(
+            {"_id": user_id},
+            {
+                "$inc": {"kick_counts.count": 1},
+                "$set": {"kick_counts.last_kicked_at": discord.utils.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc.get("kick_counts", {}).get("count", 0)
+
+    async def quarantine(self, user_id: int, role_ids: List[int]):
+        """Reset the kick count and remember the roles taken away."""
+        await self.collection.update_one(
+            {"_id": user_id},
+            {"$set": {"kick_counts.count": 0, "kick_counts.previous_roles": role_ids}}
+        )
+
+    async def previous_roles(self, user_id: int) -> List[int]:
+        doc = await self.collection.find_one({"_id": user_id}, {"kick_counts.previous_roles": 1})
+        return doc.get("kick_counts", {}).get("previous_roles", []) if doc else []
+
+    async def clear_previous_roles(self, user_id: int):
+        await self.collection.update_one({"_id": user_id}, {"$unset": {"kick_counts.previous_roles": ""}})
+
+    async def reset(self, user_id: int) -> bool:
+        """Reset a user's kick count. Returns False if the user has no record."""
+        result = await self.collection.update_one({"_id": user_id}, {"$set": {"kick_counts.count": 0}})
+        return result.matched_count > 0
+
+
+class EmbedRepository:
+    """Message ids of the per-voice-channel member embeds (`vc_embeds` collection)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def message_ids(self) -> Dict[int, int]:
+        message_ids = {}
+        async for doc in self.collection.find({}, {"voice_channel_id": 1, "message_id": 1}):
+            if doc.get("voice_channel_id") and doc.get("message_id"):
+                message_ids[doc["voice_channel_id"]] = doc["message_id"]
+        return message_ids
+
+    async def save(self, guild_id: int, channel_id: int, message_id: int):
+        await self.collection.update_one(
+            {"voice_channel_id": channel_id},
+            {"$set": {"message_id": message_id, "guild_id": guild_id}},
+            upsert=True
+        )
+
+    async def delete(self, channel_id: int):
+        await self.collection.delete_one({"voice_channel_id": channel_id})
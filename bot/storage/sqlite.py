@@ -0,0 +1,150 @@
+import asyncio
+import datetime
+import json
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+from bot.storage.base import DocumentCollection, DocumentDatabase
+
+
+def _encode(value) -> str:
+    def default(obj):
+        if isinstance(obj, datetime.datetime):
+            return {"$date": obj.isoformat()}
+        raise TypeError(f"Cannot store {type(obj).__name__}")
+
+    return json.dumps(value, default=default)
+
+
+def _decode(text: str):
+    def object_hook(obj):
+        if len(obj) == 1 and "$date" in obj:
+            return datetime.datetime.fromisoformat(obj["$date"])
+        return obj
+
+    return json.loads(text, object_hook=object_hook)
+
+
+# Top-level scalar fields the bot filters on, per collection. Each gets an
+# expression index, and equality and `$in` filters on them (and on `_id`) run
+# in SQL instead of decoding every row. Values at these paths must not be
+# arrays, since SQL equality doesn't match array elements.
+INDEXED_FIELDS = {
+    "guild_config": ("guild_id",),
+    "temp_registry": ("guild_id",),
+    "vc_blocks": ("voice_channel_id", "guild_id"),
+    "vc_embeds": ("voice_channel_id", "guild_id"),
+}
+
+
+def _key_value(value) -> bool:
+    return isinstance(value, (int, str)) and not isinstance(value, bool)
+
+
+def _decode_rows(rows: list) -> List[Tuple[Any, dict]]:
+    return [(position, _decode(doc)) for position, doc in rows]
+
+
+class SQLiteCollection(DocumentCollection):
+    """
+    One table per collection: the JSON-encoded `_id` as primary key and the
+    document as JSON, plus an expression index per `INDEXED_FIELDS` entry.
+    Scans page through the table by rowid, which `_put` preserves.
+    """
+
+    def __init__(self, database: "SQLiteDatabase", name: str):
+        super().__init__(name)
+        if not re.fullmatch(r"\w+", name):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        self.database = database
+        self.table = f'"{name}"'
+        self.fields = INDEXED_FIELDS.get(name, ())
+        database.execute_now(f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+        for field in self.fields:
+            database.execute_now(
+                f'CREATE INDEX IF NOT EXISTS "{name}_{field}" ON {self.table} ({self._column(field)})'
+            )
+
+    @staticmethod
+    def _column(field: str) -> str:
+        return f"json_extract(doc, '$.{field}')"
+
+    def _pushdown(self, query: dict) -> Tuple[List[str], list]:
+        """SQL conditions for the filter's equality and `$in` clauses on `_id` and indexed fields."""
+        clauses, params = [], []
+        for path, condition in query.items():
+            if path == "_id":
+                column, encode = "id", _encode
+            elif path in self.fields:
+                column, encode = self._column(path), (lambda value: value)
+            else:
+                continue
+
+            if _key_value(condition):
+                clauses.append(f"{column} = ?")
+                params.append(encode(condition))
+            elif (
+                    isinstance(condition, dict) and list(condition) == ["$in"]
+                    and all(_key_value(value) for value in condition["$in"])
+            ):
+                values = list(condition["$in"])
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(encode(value) for value in values)
+        return clauses, params
+
+    async def _get(self, doc_id) -> Optional[dict]:
+        rows = await self.database.execute(f"SELECT doc FROM {self.table} WHERE id = ?", (_encode(doc_id),))
+        return _decode(rows[0][0]) if rows else None
+
+    async def _put(self, doc: dict):
+        # An upsert rather than INSERT OR REPLACE, which would move the row to a new rowid
+        await self.database.execute(
+            f"INSERT INTO {self.table} (id, doc) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET doc = excluded.doc",
+            (_encode(doc["_id"]), _encode(doc))
+        )
+
+    async def _delete(self, doc_id):
+        await self.database.execute(f"DELETE FROM {self.table} WHERE id = ?", (_encode(doc_id),))
+
+    async def _scan(self, query: dict, after, limit: int) -> List[Tuple[Any, dict]]:
+        clauses, params = self._pushdown(query)
+        if after is not None:
+            clauses.append("rowid > ?")
+            params.append(after)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return await self.database.execute(
+            f"SELECT rowid, doc FROM {self.table}{where} ORDER BY rowid LIMIT ?",
+            (*params, limit),
+            convert=_decode_rows
+        )
+
+
+class SQLiteDatabase(DocumentDatabase):
+    """
+    Single-file storage in SQLite using WAL journaling. Statements, and
+    decoding their results, run in the loop's default thread pool, so the
+    event loop never blocks on disk.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._thread_lock = threading.Lock()
+
+    def execute_now(self, sql: str, params: tuple = (), convert: Callable[[list], Any] = None):
+        with self._thread_lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        return convert(rows) if convert else rows
+
+    async def execute(self, sql: str, params: tuple = (), convert: Callable[[list], Any] = None):
+        return await asyncio.get_running_loop().run_in_executor(None, self.execute_now, sql, params, convert)
+
+    def _create_collection(self, name: str) -> SQLiteCollection:
+        return SQLiteCollection(self, name)
+
+    def close(self):
+        self._connection.close()
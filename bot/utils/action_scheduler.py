@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+import itertools
+from enum import IntEnum
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+import discord
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    MOVE = 0
+    VOTE = 1
+    DISPLAY = 2
+    LOG = 3
+
+
+# Discord rate limits per route and "major parameter". These helpers name the
+# bucket an action falls into, so unrelated routes never queue behind each other.
+
+def members_bucket(guild: discord.Guild):
+    return "members", guild.id
+
+
+def channel_messages_bucket(channel: discord.abc.Messageable):
+    return "messages", channel.id
+
+
+def channel_edit_bucket(channel: discord.abc.GuildChannel):
+    return "channel", channel.id
+
+
+def guild_channels_bucket(guild: discord.Guild):
+    return "guild_channels", guild.id
+
+
+class _Action:
+    __slots__ = ("priority", "seq", "run", "future", "key", "superseded")
+
+    def __init__(self, priority: int, seq: int, run: Callable[[], Awaitable], future: asyncio.Future, key):
+        self.priority = priority
+        self.seq = seq
+        self.run = run
+        self.future = future
+        self.key = key
+        self.superseded = False
+
+    def __lt__(self, other: "_Action"):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ActionScheduler:
+    """
+    Central queue for outbound Discord REST actions.
+
+    Actions are queued per route bucket and each bucket runs one action at a
+    time, lowest `Priority` first, FIFO within a priority. Buckets run in
+    parallel, so a member move never waits behind a channel's log backlog.
+
+    Actions submitted with a `key` supersede any still-pending action with the
+    same key: the older one is dropped and its future resolves with the newer
+    action's result. Use this for edits where only the latest content matters.
+    """
+
+    def __init__(self):
+        self._queues: Dict[Hashable, List[_Action]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._pending_keys: Dict[Hashable, _Action] = {}
+        self._seq = itertools.count()
+
+    def submit(self, bucket: Hashable, priority: Priority, run: Callable[[], Awaitable[T]], key: Hashable = None) -> "asyncio.Future[T]":
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._report)
+        action = _Action(priority, next(self._seq), run, future, key)
+
+        if key is not None:
+            previous = self._pending_keys.get(key)
+            if previous is not None:
+                previous.superseded = True
+                previous.future.remove_done_callback(self._report)
+                future.add_done_callback(lambda done, old=previous.future: _chain(done, old))
+            self._pending_keys[key] = action
+
+        heapq.heappush(self._queues.setdefault(bucket, []), action)
+        if bucket not in self._workers:
+            self._workers[bucket] = asyncio.create_task(self._work(bucket))
+        return future
+
+    def backlog(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def _work(self, bucket: Hashable):
+        queue = self._queues[bucket]
+        try:
+            while queue:
+                action = heapq.heappop(queue)
+                if action.key is not None and self._pending_keys.get(action.key) is action:
+                    del self._pending_keys[action.key]
+                if action.superseded or action.future.cancelled():
+                    continue
+                try:
+                    result = await action.run()
+                except asyncio.CancelledError:
+                    action.future.cancel()
+                    raise
+                except Exception as e:
+                    if not action.future.cancelled():
+                        action.future.set_exception(e)
+                else:
+                    if not action.future.cancelled():
+                        action.future.set_result(result)
+        finally:
+            self._workers.pop(bucket, None)
+            if not queue:
+                self._queues.pop(bucket, None)
+
+    @staticmethod
+    def _report(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Discord action failed: {future.exception()!r}")
+
+    # Shortcuts for the actions the cogs perform
+
+    def move(self, member: discord.Member, channel: Optional[discord.abc.Connectable], reason: str = None):
+        return self.submit(members_bucket(member.guild), Priority.MOVE, lambda: member.move_to(channel, reason=reason))
+
+    def send(self, channel: discord.abc.Messageable, priority: Priority = Priority.LOG, **fields):
+        return self.submit(channel_messages_bucket(channel), priority, lambda: channel.send(**fields))
+
+    def edit_message(self, message: discord.PartialMessage, priority: Priority = Priority.DISPLAY, **fields):
+        return self.submit(
+            channel_messages_bucket(message.channel),
+            priority,
+            lambda: message.edit(**fields),
+            key=("edit", message.id)
+        )
+
+    async def close(self, timeout: float = 10):
+        """Let queued actions run for up to `timeout` seconds, then cancel whatever is left."""
+        workers = list(self._workers.values())
+        if workers:
+            await asyncio.wait(workers, timeout=timeout)
+
+        leftover = list(self._workers.values())
+        for worker in leftover:
+            worker.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+        self._workers.clear()
+        for queue in self._queues.values():
+            for action in queue:
+                action.future.cancel()
+        self._queues.clear()
+        self._pending_keys.clear()
+
+
+def _chain(source: asyncio.Future, target: asyncio.Future):
+    if target.done():
+        return
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
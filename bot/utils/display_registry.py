@@ -0,0 +1,74 @@
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import discord
+
+from bot.utils.action_scheduler import ActionScheduler, Priority, channel_messages_bucket
+
+
+class DisplayRegistry:
+    """
+    `PartialMessage` handles for the bot's long-lived display messages, keyed by
+    guild and purpose, so renders can edit them without a `fetch_message` first.
+
+    A handle is seeded from the persisted message id the first time it is
+    needed. Only when Discord answers `NotFound` is a new message sent, and its
+    id handed to the caller's `persist` callback. Edits go through the action
+    scheduler keyed by message, so a queued edit is replaced by a newer one.
+    """
+
+    def __init__(self, actions: ActionScheduler):
+        self.actions = actions
+        self._messages: Dict[Tuple[int, str], discord.PartialMessage] = {}
+
+    def get(self, channel: discord.abc.Messageable, guild_id: int, purpose: str, message_id: Optional[int]):
+        message = self._messages.get((guild_id, purpose))
+        if message is not None and message.channel.id == channel.id:
+            return message
+        if not message_id:
+            return None
+        message = channel.get_partial_message(int(message_id))
+        self._messages[(guild_id, purpose)] = message
+        return message
+
+    def forget(self, guild_id: int, purpose: str):
+        self._messages.pop((guild_id, purpose), None)
+
+    async def publish(
+            self,
+            channel: discord.abc.Messageable,
+            guild_id: int,
+            purpose: str,
+            message_id: Optional[int],
+            persist: Callable[[int], Awaitable[None]],
+            priority: Priority = Priority.DISPLAY,
+            **fields
+    ):
+        """Edit the display in place, or send and persist a replacement if it is gone."""
+        message = self.get(channel, guild_id, purpose, message_id)
+        if message is not None:
+            try:
+                await self.actions.edit_message(message, priority, **fields)
+                return message
+            except discord.NotFound:
+                self.forget(guild_id, purpose)
+
+        sent = await self.actions.send(channel, priority, **fields)
+        message = channel.get_partial_message(sent.id)
+        self._messages[(guild_id, purpose)] = message
+        await persist(sent.id)
+        return message
+
+    async def delete(self, channel: discord.abc.Messageable, guild_id: int, purpose: str, message_id: Optional[int]):
+        message = self.get(channel, guild_id, purpose, message_id)
+        self.forget(guild_id, purpose)
+        if message is None:
+            return
+        try:
+            await self.actions.submit(
+                channel_messages_bucket(channel),
+                Priority.DISPLAY,
+                message.delete,
+                key=("edit", message.id)
+            )
+        except discord.NotFound:
+            pass
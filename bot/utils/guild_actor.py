@@ -0,0 +1,91 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+Command = Tuple[Callable[[], Awaitable], asyncio.Future]
+
+
+class GuildActor:
+    """
+    Serial executor with one mailbox per guild.
+
+    Commands submitted for a guild run one at a time, in submission order, on
+    that guild's worker task; different guilds run in parallel. A worker exits
+    after `idle_timeout` seconds without work and is recreated on demand.
+
+    A command must not `run` another command for its own guild and await it:
+    the worker is busy with the caller, so that would deadlock.
+    """
+
+    def __init__(self, idle_timeout: float = 60):
+        self.idle_timeout = idle_timeout
+        self._mailboxes: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    def submit(self, guild_id: int, command: Callable[[], Awaitable[T]]) -> "asyncio.Future[T]":
+        future = asyncio.get_running_loop().create_future()
+        mailbox = self._mailboxes.setdefault(guild_id, asyncio.Queue())
+        mailbox.put_nowait((command, future))
+        if guild_id not in self._workers:
+            self._workers[guild_id] = asyncio.create_task(self._work(guild_id, mailbox))
+        return future
+
+    async def run(self, guild_id: int, command: Callable[[], Awaitable[T]]) -> T:
+        """Submit a command and wait for its result."""
+        return await self.submit(guild_id, command)
+
+    def backlog(self, guild_id: int = None) -> int:
+        if guild_id is not None:
+            mailbox = self._mailboxes.get(guild_id)
+            return mailbox.qsize() if mailbox else 0
+        return sum(mailbox.qsize() for mailbox in self._mailboxes.values())
+
+    async def _work(self, guild_id: int, mailbox: asyncio.Queue):
+        try:
+            while True:
+                try:
+                    command, future = await asyncio.wait_for(mailbox.get(), timeout=self.idle_timeout)
+                except asyncio.TimeoutError:
+                    if mailbox.empty():
+                        return
+                    continue
+
+                if future.cancelled():
+                    continue
+                try:
+                    result = await command()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    if not future.cancelled():
+                        future.set_exception(e)
+                else:
+                    if not future.cancelled():
+                        future.set_result(result)
+        finally:
+            self._workers.pop(guild_id, None)
+            if mailbox.empty():
+                self._mailboxes.pop(guild_id, None)
+
+    async def close(self, timeout: float = 10):
+        """Let queued commands finish for up to `timeout` seconds, then cancel whatever is left."""
+        async def noop():
+            pass
+
+        # A no-op at the back of each mailbox completes once everything ahead of it has run
+        drained = [self.submit(guild_id, noop) for guild_id in list(self._workers)]
+        if drained:
+            await asyncio.wait(drained, timeout=timeout)
+
+        leftover = list(self._workers.values())
+        for worker in leftover:
+            worker.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+        self._workers.clear()
+        for mailbox in self._mailboxes.values():
+            while not mailbox.empty():
+                _, future = mailbox.get_nowait()
+                future.cancel()
+        self._mailboxes.clear()
@@ -0,0 +1,60 @@
+import importlib
+import os
+from typing import Iterable
+
+import discord
+
+# Every cog needs the guild and channel cache
+BASE_INTENTS = {"guilds"}
+
+
+def required_intents(extensions: Iterable[str]) -> discord.Intents:
+    """
+    Union of the gateway intents the extensions declare in a module-level
+    `intents` set. Extension packages import their cogs lazily, so this only
+    imports the package `__init__`s.
+    """
+    names = set(BASE_INTENTS)
+    for extension in extensions:
+        module = importlib.import_module(extension)
+        names |= set(getattr(module, "intents", ()))
+
+    intents = discord.Intents.none()
+    for name in names:
+        setattr(intents, name, True)
+    return intents
+
+
+def startup_profile(extensions: Iterable[str], profile: str = None) -> dict:
+    """
+    Client options for an intents profile, chosen with BOT_INTENTS_PROFILE.
+
+    `minimal` (default) enables only the intents the extensions declare, caches
+    just the members currently in voice and doesn't chunk guilds at startup;
+    `guild.chunk()` can still fill a guild's member cache on demand. `full` is
+    every intent with a complete member cache.
+    """
+    profile = profile or os.getenv("BOT_INTENTS_PROFILE", "minimal")
+    if profile == "full":
+        return {
+            "intents": discord.Intents.all(),
+            "member_cache_flags": discord.MemberCacheFlags.all(),
+            "chunk_guilds_at_startup": True,
+        }
+    if profile != "minimal":
+        raise ValueError(f"Unknown intents profile: {profile}")
+
+    intents = required_intents(extensions)
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = intents.voice_states
+    return {
+        "intents": intents,
+        "member_cache_flags": member_cache_flags,
+        "chunk_guilds_at_startup": False,
+    }
+
+
+def cache_footprint(client: discord.Client) -> str:
+    members = sum(len(guild.members) for guild in client.guilds)
+    channels = sum(len(guild.channels) for guild in client.guilds)
+    return f"{len(client.guilds)} guilds, {channels} channels, {members} members, {len(client.users)} users cached"
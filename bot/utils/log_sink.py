@@ -0,0 +1,58 @@
+import asyncio
+from typing import Dict, List
+
+import discord
+
+from bot.utils.action_scheduler import ActionScheduler, Priority
+
+MESSAGE_LIMIT = 2000
+
+
+class LogSink:
+    """
+    Batches log lines per text channel.
+
+    Lines are buffered and sent as a single message every `interval` seconds,
+    or as soon as the buffer would no longer fit in one message. `close`
+    flushes whatever is left, so nothing is lost on shutdown.
+    """
+
+    def __init__(self, actions: ActionScheduler, interval: float):
+        self.actions = actions
+        self.interval = interval
+        self._buffers: Dict[int, List[str]] = {}
+        self._sizes: Dict[int, int] = {}
+        self._channels: Dict[int, discord.abc.Messageable] = {}
+        self._timers: Dict[int, asyncio.TimerHandle] = {}
+
+    def log(self, channel: discord.abc.Messageable, line: str):
+        if channel is None:
+            return
+        line = line[:MESSAGE_LIMIT]
+        size = self._sizes.get(channel.id, 0)
+        if size and size + 1 + len(line) > MESSAGE_LIMIT:
+            self.flush(channel.id)
+
+        self._channels[channel.id] = channel
+        self._buffers.setdefault(channel.id, []).append(line)
+        self._sizes[channel.id] = self._sizes.get(channel.id, -1) + 1 + len(line)
+        if channel.id not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[channel.id] = loop.call_later(self.interval, self.flush, channel.id)
+
+    def flush(self, channel_id: int):
+        timer = self._timers.pop(channel_id, None)
+        if timer:
+            timer.cancel()
+        lines = self._buffers.pop(channel_id, None)
+        self._sizes.pop(channel_id, None)
+        channel = self._channels.pop(channel_id, None)
+        if not lines or channel is None:
+            return None
+        return self.actions.send(channel, Priority.LOG, content="\n".join(lines))
+
+    async def close(self):
+        pending = [self.flush(channel_id) for channel_id in list(self._buffers)]
+        pending = [future for future in pending if future is not None]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,151 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class OrderedQueue:
+    """
+    A FIFO of entry dicts keyed by `user_id`.
+
+    Entries live in an insertion-ordered dict, so membership, append and
+    removal from anywhere are O(1). Each entry also holds a slot number in a
+    Fenwick tree that counts live slots, which makes a user's position a
+    prefix sum: O(log n). Slots only grow; when they run out the live entries
+    are renumbered 1..n into a tree twice their size.
+    """
+
+    def __init__(self, entries: Iterable[dict] = ()):
+        self._entries: Dict[int, dict] = {}
+        self._slots: Dict[int, int] = {}
+        self._tree: List[int] = [0]
+        self._next_slot = 1
+        for entry in entries:
+            self.push(entry)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._entries
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._entries.values())
+
+    def entries(self) -> List[dict]:
+        return list(self._entries.values())
+
+    def first(self) -> Optional[dict]:
+        return next(iter(self._entries.values()), None)
+
+    def position(self, user_id: int) -> Optional[int]:
+        """1-based position of a user, or None if they aren't queued."""
+        slot = self._slots.get(user_id)
+        if slot is None:
+            return None
+        position = 0
+        while slot > 0:
+            position += self._tree[slot]
+            slot -= slot & -slot
+        return position
+
+    def push(self, entry: dict) -> bool:
+        user_id = entry["user_id"]
+        if user_id in self._entries:
+            return False
+        if self._next_slot >= len(self._tree):
+            self._rebuild()
+        self._entries[user_id] = entry
+        self._slots[user_id] = self._next_slot
+        self._add(self._next_slot, 1)
+        self._next_slot += 1
+        return True
+
+    def remove(self, user_id: int) -> Optional[dict]:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._add(self._slots.pop(user_id), -1)
+        return entry
+
+    def _add(self, slot: int, delta: int):
+        while slot < len(self._tree):
+            self._tree[slot] += delta
+            slot += slot & -slot
+
+    def _rebuild(self):
+        """Renumber live entries to slots 1..n and rebuild the tree in O(n)."""
+        size = max(2 * len(self._entries), 16)
+        tree = [0] * (size + 1)
+        for slot, user_id in enumerate(self._entries, start=1):
+            self._slots[user_id] = slot
+            tree[slot] = 1
+        for slot in range(1, size + 1):
+            parent = slot + (slot & -slot)
+            if parent <= size:
+                tree[parent] += tree[slot]
+        self._tree = tree
+        self._next_slot = len(self._entries) + 1
+
+
+class TieredQueue:
+    """
+    Several OrderedQueues served highest tier first, FIFO within a tier.
+
+    An entry's tier is its optional `tier` key (0 when absent), so plain
+    queues cost nothing extra and a persisted queue is just its entries in
+    service order. There are only a handful of tiers, so finding the next
+    entry or a position walks the tiers and then asks one OrderedQueue:
+    O(tiers) and O(tiers + log n).
+    """
+
+    def __init__(self, entries: Iterable[dict] = ()):
+        self._tiers: Dict[int, OrderedQueue] = {}
+        self._order: List[int] = []  # tiers present, highest first
+        self._tier_of: Dict[int, int] = {}
+        for entry in entries:
+            self.push(entry)
+
+    def __len__(self) -> int:
+        return len(self._tier_of)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._tier_of
+
+    def __iter__(self) -> Iterator[dict]:
+        for tier in self._order:
+            yield from self._tiers[tier]
+
+    def entries(self) -> List[dict]:
+        return list(self)
+
+    def first(self) -> Optional[dict]:
+        for tier in self._order:
+            if self._tiers[tier]:
+                return self._tiers[tier].first()
+        return None
+
+    def position(self, user_id: int) -> Optional[int]:
+        """1-based position of a user across all tiers, or None if they aren't queued."""
+        tier = self._tier_of.get(user_id)
+        if tier is None:
+            return None
+        ahead = 0
+        for other in self._order:
+            if other == tier:
+                return ahead + self._tiers[tier].position(user_id)
+            ahead += len(self._tiers[other])
+
+    def push(self, entry: dict) -> bool:
+        user_id = entry["user_id"]
+        if user_id in self._tier_of:
+            return False
+        tier = entry.get("tier", 0)
+        if tier not in self._tiers:
+            self._tiers[tier] = OrderedQueue()
+            self._order = sorted(self._tiers, reverse=True)
+        self._tiers[tier].push(entry)
+        self._tier_of[user_id] = tier
+        return True
+
+    def remove(self, user_id: int) -> Optional[dict]:
+        tier = self._tier_of.pop(user_id, None)
+        if tier is None:
+            return None
+        return self._tiers[tier].remove(user_id)
@@ -0,0 +1,84 @@
+import abc
+from typing import List, Sequence, Tuple, TypeVar
+
+import discord
+
+T = TypeVar("T")
+
+# Lines per embed page. Also the number of options in the target select, which
+# Discord caps at 25.
+PAGE_SIZE = 20
+
+
+def page_count(total: int, per_page: int = PAGE_SIZE) -> int:
+    return max(1, -(-total // per_page))
+
+
+def page_slice(items: Sequence[T], page: int, per_page: int = PAGE_SIZE) -> Tuple[int, List[T]]:
+    """Clamp `page` to the items and return it with the items on that page."""
+    page = min(max(page, 0), page_count(len(items), per_page) - 1)
+    start = page * per_page
+    return page, list(items[start:start + per_page])
+
+
+class PagedDisplayView(discord.ui.View, metaclass=abc.ABCMeta):
+    """
+    Controls for a paged display: previous/next buttons, a page indicator and a
+    select listing the targets on the current page.
+
+    Custom ids are fixed per display kind (`{prefix}:prev`, `{prefix}:target`,
+    ...), so the message is the same size however long the list gets, and one
+    instance registered with `bot.add_view` handles every message of that kind,
+    including after a restart. Subclasses implement `on_page` and `on_target`.
+    """
+
+    def __init__(self, prefix: str, placeholder: str, page: int = 0, pages: int = 1,
+                 options: Sequence[discord.SelectOption] = ()):
+        super().__init__(timeout=None)
+
+        self.prev_button = discord.ui.Button(
+            label="◀", style=discord.ButtonStyle.secondary, custom_id=f"{prefix}:prev", disabled=page <= 0
+        )
+        self.page_button = discord.ui.Button(
+            label=f"Page {page + 1}/{pages}", style=discord.ButtonStyle.secondary, custom_id=f"{prefix}:page",
+            disabled=True
+        )
+        self.next_button = discord.ui.Button(
+            label="▶", style=discord.ButtonStyle.secondary, custom_id=f"{prefix}:next", disabled=page >= pages - 1
+        )
+        self.target_select = discord.ui.Select(
+            custom_id=f"{prefix}:target",
+            placeholder=placeholder,
+            options=list(options) or [discord.SelectOption(label="Nobody here", value="0")],
+            disabled=not options,
+            row=1
+        )
+
+        self.prev_button.callback = lambda interaction: self.on_page(interaction, -1)
+        self.next_button.callback = lambda interaction: self.on_page(interaction, 1)
+        self.target_select.callback = self._target_callback
+
+        for item in (self.prev_button, self.page_button, self.next_button, self.target_select):
+            self.add_item(item)
+
+    async def _target_callback(self, interaction: discord.Interaction):
+        try:
+            target_id = int(self.target_select.values[0])
+        except (IndexError, ValueError):
+            await interaction.response.send_message("Invalid selection.", ephemeral=True)
+            return
+        await self.on_target(interaction, target_id)
+
+    @abc.abstractmethod
+    async def on_page(self, interaction: discord.Interaction, delta: int):
+        """Show the page `delta` pages away from the current one."""
+
+    @abc.abstractmethod
+    async def on_target(self, interaction: discord.Interaction, target_id: int):
+        """Act on the target picked in the select."""
+
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item: discord.ui.Item):
+        if interaction.response.is_done():
+            await interaction.followup.send(f"An error occurred: {error}", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"An error occurred: {error}", ephemeral=True)
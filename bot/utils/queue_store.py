@@ -0,0 +1,241 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from bot.utils.ordered_queue import TieredQueue
+
+
+@dataclass(frozen=True)
+class QueueField:
+    collection: str
+    key: str
+    field: str
+
+
+class QueueStore:
+    """
+    Authoritative in-memory queues, written behind to MongoDB.
+
+    A mutation is applied in memory, appended to a local JSON-lines journal
+    with a sequence number and marks its queue dirty, without waiting on the
+    database. Every `interval` seconds (and on `close`) the dirty queues are
+    written with one `bulk_write` per collection, then the highest flushed
+    sequence number is recorded in `bot_meta` and the journal is rewritten to
+    only the entries after it.
+
+    `load` reads the queues from MongoDB and replays the journal entries after
+    the recorded sequence number. Every journal operation is idempotent
+    (push-if-absent, remove-by-user, clear), so replaying entries that were
+    flushed just before a crash is harmless.
+
+    Queues are `TieredQueue`s of entry dicts with a `user_id` and an optional
+    priority `tier`, so membership is O(1) and a user's position O(log n).
+    `get` returns a fresh list in service order (highest tier first, FIFO
+    within a tier), which is also the order persisted. Callers serialise mutations per guild (the queue cogs do so
+    on the guild actor).
+    """
+
+    def __init__(self, db, fields: Dict[str, QueueField], journal_path: str, interval: float):
+        self.db = db
+        self.fields = fields
+        self.journal_path = journal_path
+        self.interval = interval
+        self._queues: Dict[Tuple[str, int], TieredQueue] = {}
+        self._dirty: Set[Tuple[str, int]] = set()
+        self._pending: List[dict] = []  # journal entries not yet flushed
+        self._seq = 0
+        self._journal = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None  # timer-started flush, awaited by close
+        self._flush_lock = asyncio.Lock()
+
+    async def load(self):
+        queues = {}
+        for name, spec in self.fields.items():
+            cursor = self.db[spec.collection].find({}, {spec.key: 1, spec.field: 1})
+            async for doc in cursor:
+                queues[(name, doc[spec.key])] = TieredQueue(doc.get(spec.field, []))
+        self._queues = queues
+
+        meta = await self.db.bot_meta.find_one({"_id": "queue_journal"})
+        flushed = meta.get("seq", 0) if meta else 0
+        self._seq = flushed
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn final line
+                    self._seq = max(self._seq, entry["seq"])
+                    if entry["seq"] > flushed:
+                        self._apply(entry)
+                        self._pending.append(entry)
+                        self._dirty.add((entry["queue"], entry["guild_id"]))
+                        replayed += 1
+
+        self._rewrite_journal()
+        print(f"Loaded {len(queues)} queues, replayed {replayed} journal entries")
+        if self._dirty:
+            await self.flush()
+
+    # Reads
+
+    def get(self, name: str, guild_id: int) -> List[dict]:
+        queue = self._queues.get((name, guild_id))
+        return queue.entries() if queue else []
+
+    def first(self, name: str, guild_id: int) -> Optional[dict]:
+        queue = self._queues.get((name, guild_id))
+        return queue.first() if queue else None
+
+    def size(self, name: str, guild_id: int) -> int:
+        return len(self._queues.get((name, guild_id), ()))
+
+    def contains(self, name: str, guild_id: int, user_id: int) -> bool:
+        return user_id in self._queues.get((name, guild_id), ())
+
+    def position(self, name: str, guild_id: int, user_id: int) -> Optional[int]:
+        """1-based position of a user in a queue, or None if they aren't in it."""
+        queue = self._queues.get((name, guild_id))
+        return queue.position(user_id) if queue else None
+
+    # Mutations
+
+    def push(self, name: str, guild_id: int, entry: dict) -> bool:
+        """Append an entry unless its user is already queued."""
+        if self.contains(name, guild_id, entry["user_id"]):
+            return False
+        self._record({"op": "push", "queue": name, "guild_id": guild_id, "entry": entry})
+        return True
+
+    def remove(self, name: str, guild_id: int, user_id: int) -> bool:
+        if not self.contains(name, guild_id, user_id):
+            return False
+        self._record({"op": "remove", "queue": name, "guild_id": guild_id, "user_id": user_id})
+        return True
+
+    def remove_many(self, name: str, guild_id: int, user_ids) -> int:
+        """Remove several users with a single journal entry. Returns how many were queued."""
+        user_ids = [user_id for user_id in user_ids if self.contains(name, guild_id, user_id)]
+        if user_ids:
+            self._record({"op": "remove", "queue": name, "guild_id": guild_id, "user_ids": user_ids})
+        return len(user_ids)
+
+    def pop_first(self, name: str, guild_id: int) -> Optional[dict]:
+        first = self.first(name, guild_id)
+        if first is not None:
+            self.remove(name, guild_id, first["user_id"])
+        return first
+
+    def clear(self, name: str, guild_id: int):
+        if not self.size(name, guild_id):
+            return
+        self._record({"op": "clear", "queue": name, "guild_id": guild_id})
+
+    def _record(self, entry: dict):
+        self._seq += 1
+        entry["seq"] = self._seq
+        self._apply(entry)
+        self._pending.append(entry)
+        self._write(entry)
+        self._dirty.add((entry["queue"], entry["guild_id"]))
+        if self._timer is None:
+            self._schedule_flush()
+
+    def _apply(self, entry: dict):
+        key = (entry["queue"], entry["guild_id"])
+        queue = self._queues.setdefault(key, TieredQueue())
+        if entry["op"] == "push":
+            queue.push(entry["entry"])
+        elif entry["op"] == "remove":
+            for user_id in entry["user_ids"] if "user_ids" in entry else [entry["user_id"]]:
+                queue.remove(user_id)
+        elif entry["op"] == "clear":
+            self._queues[key] = TieredQueue()
+
+    # Journal
+
+    def _write(self, entry: dict):
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+
+    def _rewrite_journal(self):
+        """Replace the journal with just the unflushed entries."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as journal:
+            for entry in self._pending:
+                journal.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, self.journal_path)
+
+    # Write-behind
+
+    def _schedule_flush(self):
+        loop = asyncio.get_running_loop()
+        self._timer = loop.call_later(self.interval, self._start_flush)
+
+    def _start_flush(self):
+        self._timer = None
+        self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        async with self._flush_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+
+            dirty, self._dirty = self._dirty, set()
+            flushed_seq = self._seq
+            requests: Dict[str, List[UpdateOne]] = {}
+            for name, guild_id in dirty:
+                spec = self.fields[name]
+                requests.setdefault(spec.collection, []).append(UpdateOne(
+                    {spec.key: guild_id},
+                    {"$set": {spec.field: self.get(name, guild_id)}},
+                    upsert=True
+                ))
+
+            try:
+                for collection, updates in requests.items():
+                    await self.db[collection].bulk_write(updates, ordered=False)
+                await self.db.bot_meta.update_one(
+                    {"_id": "queue_journal"}, {"$set": {"seq": flushed_seq}}, upsert=True
+                )
+            except Exception as e:
+                print(f"Error flushing queues, will retry: {e}")
+                self._dirty |= dirty
+                self._schedule_flush()
+                return
+
+            self._pending = [entry for entry in self._pending if entry["seq"] > flushed_seq]
+            self._rewrite_journal()
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Let a timer-started flush finish rather than cancelling it mid-write,
+        # then flush whatever it didn't cover
+        if self._flush_task is not None:
+            await self._flush_task
+            self._flush_task = None
+        await self.flush()
+        if self._timer is not None:  # the final flush failed and scheduled a retry
+            self._timer.cancel()
+            self._timer = None
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
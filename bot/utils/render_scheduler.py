@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Set
+
+import discord
+
+
+class RenderScheduler:
+    """
+    Coalesces display refreshes per target (a guild, or a channel for
+    per-channel displays), keyed by the target's id.
+
+    `mark_dirty` never renders inline. An idle target is rendered on the next
+    loop iteration; after that, renders are spaced at least `window` seconds
+    apart and every change made in between is folded into the next one. The
+    render callback reads the latest state itself, so a burst of changes costs
+    one edit and the last change is visible at most `window` seconds (plus one
+    render) later. A target's task stays alive for one window after its last
+    render, so the spacing holds without keeping per-target state around
+    afterwards.
+    """
+
+    def __init__(self, render: Callable[[discord.abc.Snowflake], Awaitable[None]], window: float):
+        self.render = render
+        self.window = window
+        self._dirty: Set[int] = set()
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def mark_dirty(self, target: discord.abc.Snowflake):
+        self._dirty.add(target.id)
+        if target.id not in self._tasks:
+            self._tasks[target.id] = asyncio.create_task(self._run(target))
+
+    async def _run(self, target: discord.abc.Snowflake):
+        last_render = None
+        try:
+            while True:
+                if last_render is not None:
+                    delay = last_render + self.window - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if target.id not in self._dirty:
+                    break
+                self._dirty.discard(target.id)
+                last_render = time.monotonic()
+                try:
+                    await self.render(target)
+                except Exception as e:
+                    print(f"Error rendering display for {target.id}: {e}")
+        finally:
+            if self._tasks.get(target.id) is asyncio.current_task():
+                del self._tasks[target.id]
+
+    def cancel_all(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._dirty.clear()
@@ -1,14 +1,14 @@
 import os
 
-import discord
 from dotenv import load_dotenv
 
-from bot.config import Bot
+from bot.config import Bot, ShardedBot, bot_sharded
 
 load_dotenv()
 
 token = os.getenv("DISCORD_BOT_TOKEN")
 
 if __name__ == "__main__":
-    bot = Bot(command_prefix="q!", intent=discord.Intents.all(), help_command=None)
+    bot_class = ShardedBot if bot_sharded else Bot
+    bot = bot_class(command_prefix="q!", help_command=None)
     bot.run(token=token)
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+from bot.storage.memory import MemoryDatabase
+from bot.utils.ordered_queue import OrderedQueue, TieredQueue
+from bot.utils.queue_store import QueueField, QueueStore
+
+FIELDS = {"twitch_ward": QueueField("guild_config", "guild_id", "twitch_ward_queue")}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def user_ids(entries):
+    return [entry["user_id"] for entry in entries]
+
+
+def test_ordered_queue_positions_after_removals():
+    queue = OrderedQueue({"user_id": user_id} for user_id in range(1, 6))
+    assert queue.remove(2)["user_id"] == 2
+    assert queue.remove(2) is None
+    queue.remove(4)
+    assert [queue.position(user_id) for user_id in (1, 3, 5)] == [1, 2, 3]
+    assert queue.position(2) is None
+    assert queue.push({"user_id": 2})
+    assert not queue.push({"user_id": 3})
+    assert user_ids(queue) == [1, 3, 5, 2]
+    assert queue.position(2) == 4
+
+
+def test_ordered_queue_positions_survive_rebuilds():
+    queue = OrderedQueue()
+    expected = []
+    for user_id in range(200):
+        queue.push({"user_id": user_id})
+        expected.append(user_id)
+        if user_id % 3 == 0:
+            removed = expected.pop(0)
+            queue.remove(removed)
+    assert user_ids(queue) == expected
+    assert [queue.position(user_id) for user_id in expected] == list(range(1, len(expected) + 1))
+    assert queue.first()["user_id"] == expected[0]
+
+
+def test_tiered_queue_serves_highest_tier_first():
+    queue = TieredQueue([
+        {"user_id": 1},
+        {"user_id": 2, "tier": 2},
+        {"user_id": 3, "tier": 1},
+        {"user_id": 4, "tier": 2},
+        {"user_id": 5},
+    ])
+    assert user_ids(queue) == [2, 4, 3, 1, 5]
+    assert [queue.position(user_id) for user_id in (2, 4, 3, 1, 5)] == [1, 2, 3, 4, 5]
+    assert queue.first()["user_id"] == 2
+
+    queue.remove(2)
+    queue.remove(3)
+    assert queue.first()["user_id"] == 4
+    assert queue.position(1) == 2
+    assert queue.position(3) is None
+    assert not queue.push({"user_id": 1, "tier": 2})  # already queued, tier unchanged
+    assert queue.position(1) == 2
+    assert len(queue) == 3
+
+
+async def open_store(db, tmp_path, interval=3600):
+    store = QueueStore(db, FIELDS, str(tmp_path / "queue_journal.jsonl"), interval)
+    await store.load()
+    return store
+
+
+def crash(store):
+    """Drop a store without flushing, as if the process died."""
+    store._timer.cancel()
+    store._journal.close()
+
+
+def test_journal_replays_unflushed_changes_after_crash(tmp_path):
+    async def scenario():
+        db = MemoryDatabase()
+        store = await open_store(db, tmp_path)
+        for user_id in (1, 2, 3, 4):
+            store.push("twitch_ward", 10, {"user_id": user_id})
+        await store.flush()
+        store.remove("twitch_ward", 10, 1)
+        store.push("twitch_ward", 10, {"user_id": 5, "tier": 1})
+        store.remove_many("twitch_ward", 10, [3, 4])
+        crash(store)
+
+        stored = await db.guild_config.find_one({"guild_id": 10})
+        assert user_ids(stored["twitch_ward_queue"]) == [1, 2, 3, 4]
+
+        recovered = await open_store(db, tmp_path)
+        assert user_ids(recovered.get("twitch_ward", 10)) == [5, 2]
+        assert recovered.position("twitch_ward", 10, 2) == 2
+        # load flushes what it replayed and trims the journal
+        stored = await db.guild_config.find_one({"guild_id": 10})
+        assert user_ids(stored["twitch_ward_queue"]) == [5, 2]
+        assert (tmp_path / "queue_journal.jsonl").read_text() == ""
+        await recovered.close()
+
+    run(scenario())
+
+
+def test_journal_replay_is_idempotent_and_ignores_torn_line(tmp_path):
+    async def scenario():
+        db = MemoryDatabase()
+        store = await open_store(db, tmp_path)
+        store.push("twitch_ward", 10, {"user_id": 1})
+        store.push("twitch_ward", 10, {"user_id": 2})
+        store.clear("twitch_ward", 10)
+        store.push("twitch_ward", 10, {"user_id": 3})
+        journal = (tmp_path / "queue_journal.jsonl").read_text()
+        await store.close()
+
+        # Crash between writing the queues and recording the flushed sequence
+        # number, mid-way through appending another entry
+        await db.bot_meta.update_one({"_id": "queue_journal"}, {"$set": {"seq": 0}})
+        torn = json.dumps({"op": "push", "queue": "twitch_ward", "guild_id": 10,
+                           "entry": {"user_id": 9}, "seq": 5})[:20]
+        (tmp_path / "queue_journal.jsonl").write_text(journal + torn)
+
+        recovered = await open_store(db, tmp_path)
+        assert user_ids(recovered.get("twitch_ward", 10)) == [3]
+        await recovered.close()
+
+    run(scenario())
+
+
+def test_write_behind_flushes_on_timer(tmp_path):
+    async def scenario():
+        db = MemoryDatabase()
+        store = await open_store(db, tmp_path, interval=0.01)
+        store.push("twitch_ward", 10, {"user_id": 1})
+        await asyncio.sleep(0.05)
+        stored = await db.guild_config.find_one({"guild_id": 10})
+        assert user_ids(stored["twitch_ward_queue"]) == [1]
+        await store.close()
+
+    run(scenario())
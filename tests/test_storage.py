@@ -0,0 +1,161 @@
+import asyncio
+import datetime
+
+import pytest
+from pymongo import DeleteMany, ReturnDocument, UpdateMany, UpdateOne
+
+from bot.storage.memory import MemoryDatabase
+from bot.storage.sqlite import SQLiteDatabase
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def db(request, tmp_path):
+    database = MemoryDatabase() if request.param == "memory" else SQLiteDatabase(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def seed(collection, docs):
+    for doc in docs:
+        await collection.insert_one(doc)
+
+
+async def ids(cursor):
+    return sorted(doc["_id"] for doc in await cursor.to_list(None))
+
+
+def test_filters(db):
+    async def scenario():
+        await seed(db.things, [
+            {"_id": 1, "guild_id": 10, "tags": [1, 2], "meta": {"level": 3}},
+            {"_id": 2, "guild_id": 10, "tags": [3], "meta": {"level": 7}},
+            {"_id": 3, "guild_id": 20},
+        ])
+        assert await ids(db.things.find({"guild_id": 10})) == [1, 2]
+        assert await ids(db.things.find({"tags": 2})) == [1]
+        assert await ids(db.things.find({"meta.level": {"$gte": 5}})) == [2]
+        assert await ids(db.things.find({"guild_id": {"$in": [20, 30]}})) == [3]
+        assert await ids(db.things.find({"guild_id": {"$nin": [20]}})) == [1, 2]
+        assert await ids(db.things.find({"guild_id": {"$ne": 10}})) == [3]
+        assert await ids(db.things.find({"tags": {"$exists": False}})) == [3]
+        assert await ids(db.things.find({"_id": {"$in": [1, 3]}, "guild_id": 20})) == [3]
+        assert await db.things.count_documents({"guild_id": 10}) == 2
+        assert await db.things.find_one({"guild_id": 99}) is None
+
+    run(scenario())
+
+
+def test_projection(db):
+    async def scenario():
+        await seed(db.things, [{"_id": 1, "a": 1, "b": {"c": 2}, "d": 3}])
+        assert await db.things.find_one({"_id": 1}, {"b.c": 1}) == {"_id": 1, "b": {"c": 2}}
+        assert await db.things.find_one({"_id": 1}, {"a": 1, "_id": 0}) == {"a": 1}
+
+    run(scenario())
+
+
+def test_updates(db):
+    async def scenario():
+        users = db.users
+        doc = await users.find_one_and_update(
+            {"_id": 7},
+            {"$inc": {"kick_counts.count": 1}, "$setOnInsert": {"created": True}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        assert doc == {"_id": 7, "kick_counts": {"count": 1}, "created": True}
+
+        await users.update_one({"_id": 7}, {"$inc": {"kick_counts.count": 1}, "$setOnInsert": {"created": False}})
+        await users.update_one({"_id": 7}, {"$set": {"kick_counts.previous_roles": [1, 2]}})
+        await users.update_one({"_id": 7}, {"$unset": {"kick_counts.previous_roles": ""}})
+        assert await users.find_one({"_id": 7}) == {"_id": 7, "kick_counts": {"count": 2}, "created": True}
+
+        result = await users.update_one({"_id": 8}, {"$set": {"a": 1}})
+        assert result.matched_count == 0 and await users.find_one({"_id": 8}) is None
+
+    run(scenario())
+
+
+def test_array_updates(db):
+    async def scenario():
+        blocks = db.vc_blocks
+        await blocks.update_one({"voice_channel_id": 5}, {"$addToSet": {"banned_user_ids": 1}}, upsert=True)
+        await blocks.update_one({"voice_channel_id": 5}, {"$addToSet": {"banned_user_ids": 1}})
+        await blocks.update_one({"voice_channel_id": 5}, {"$push": {"banned_user_ids": {"$each": [2, 3]}}})
+        doc = await blocks.find_one({"voice_channel_id": 5}, {"_id": 0})
+        assert doc == {"voice_channel_id": 5, "banned_user_ids": [1, 2, 3]}
+
+        result = await blocks.update_many({"banned_user_ids": 2}, {"$pull": {"banned_user_ids": 2}})
+        assert result.modified_count == 1
+
+        queue = db.queues
+        await queue.update_one({"_id": 1}, {"$push": {"q": {"user_id": 4, "name": "a"}}}, upsert=True)
+        await queue.update_one({"_id": 1}, {"$push": {"q": {"user_id": 5, "name": "b"}}})
+        await queue.update_one({"_id": 1}, {"$pull": {"q": {"user_id": 4}}})
+        await queue.update_one({"_id": 1}, {"$pop": {"q": -1}})
+        assert (await queue.find_one({"_id": 1}))["q"] == []
+
+    run(scenario())
+
+
+def test_bulk_write_and_deletes(db):
+    async def scenario():
+        await seed(db.vc_embeds, [{"_id": i, "voice_channel_id": 100 + i} for i in range(5)])
+        result = await db.vc_embeds.bulk_write([
+            UpdateMany({"_id": {"$in": [0, 1]}}, {"$set": {"guild_id": 9}}),
+            UpdateOne({"voice_channel_id": 200}, {"$set": {"message_id": 1}}, upsert=True),
+            DeleteMany({"_id": {"$in": [3, 4]}}),
+        ], ordered=False)
+        assert (result.modified_count, result.upserted_count, result.deleted_count) == (2, 1, 2)
+        assert await ids(db.vc_embeds.find({"guild_id": 9})) == [0, 1]
+
+        assert (await db.vc_embeds.delete_one({"voice_channel_id": 102})).deleted_count == 1
+        assert await db.vc_embeds.find_one_and_delete({"voice_channel_id": 200}, {"message_id": 1})
+        assert await db.vc_embeds.count_documents({}) == 2
+
+    run(scenario())
+
+
+def test_cursor_pages_through_concurrent_writes(db):
+    async def scenario():
+        await seed(db.vc_embeds, [{"_id": i, "voice_channel_id": i} for i in range(25)])
+        seen = []
+        async for doc in db.vc_embeds.find({}, {"voice_channel_id": 1}).batch_size(10):
+            seen.append(doc["_id"])
+            # Rewritten documents are not visited again; deleted ones in later pages are skipped
+            await db.vc_embeds.update_one({"_id": doc["_id"]}, {"$set": {"guild_id": 1}})
+            if doc["_id"] == 0:
+                await db.vc_embeds.delete_one({"_id": 24})
+        assert seen == list(range(24))
+        assert len(await db.vc_embeds.find({}).to_list(5)) == 5
+
+    run(scenario())
+
+
+def test_sqlite_persists_and_uses_indexes(tmp_path):
+    path = str(tmp_path / "test.db")
+
+    async def write():
+        db = SQLiteDatabase(path)
+        when = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        await db.vc_embeds.update_one({"voice_channel_id": 5}, {"$set": {"message_id": 6, "at": when}}, upsert=True)
+        db.close()
+
+    async def read():
+        db = SQLiteDatabase(path)
+        doc = await db.vc_embeds.find_one({"voice_channel_id": 5}, {"_id": 0})
+        plan = db.execute_now(
+            'EXPLAIN QUERY PLAN SELECT rowid, doc FROM "vc_embeds" '
+            "WHERE json_extract(doc, '$.voice_channel_id') = ?", (5,)
+        )
+        db.close()
+        return doc, " ".join(str(row) for row in plan)
+
+    run(write())
+    doc, plan = run(read())
+    assert doc == {"voice_channel_id": 5, "message_id": 6, "at": datetime.datetime(2024, 1, 2, 3, 4, 5)}
+    assert "vc_embeds_voice_channel_id" in plan